@@ -0,0 +1,403 @@
+#  Copyright (c) 2019 http://reportportal.io
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Asyncio transport for Report Portal (Python 3.5+, requires ``aiohttp``).
+
+All requests run on an event loop owned by a single background thread.
+Calls return client-side ids immediately and many requests are kept in
+flight at once; a request only waits for the requests it depends on
+(an item waits for its launch and parent, a finish or a log waits for
+the start of its item, the launch finish waits for everything before it).
+Launch and item requests take free connections before logs do.
+"""
+
+import asyncio
+import concurrent.futures
+import heapq
+import io
+import itertools
+import json
+import logging
+import threading
+import uuid
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from reportportal_client.errors import ResponseError
+from reportportal_client.helpers import verify_value_length
+
+from .backends import ReportingBackend
+from .clock import monotonic
+from .journal import _dump
+
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+# request priorities, lower first
+PRIORITY_ITEM = 0
+PRIORITY_LOG = 1
+
+# seconds before the first retry of a failed request, doubled for each retry
+RETRY_DELAY = 0.1
+
+
+def _uri_join(*uri_parts):
+    return '/'.join(str(s).strip('/').strip('\\') for s in uri_parts)
+
+
+def _dict_to_payload(values):
+    """Convert a dict of attributes or parameters to the list the API expects."""
+    if not isinstance(values, dict):
+        return values
+    values = dict(values)
+    system = values.pop('system', False)
+    return [{'key': key, 'value': str(value), 'system': system} for key, value in sorted(values.items())]
+
+
+class _PriorityLimiter(object):
+    """Semaphore which wakes up its waiters by priority, then in order."""
+
+    def __init__(self, limit, loop):
+        self._free = limit
+        self._loop = loop
+        self._waiters = []
+        self._counter = itertools.count()
+
+    async def acquire(self, priority):
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+        future = self._loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # woken up and cancelled at once, pass the slot on
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._free += 1
+
+
+class AsyncBackend(ReportingBackend):
+
+    def __init__(self, endpoint, project, token, concurrency=10, retries=0, verify_ssl=True, **kwargs):
+        if aiohttp is None:
+            raise RuntimeError('The async backend requires aiohttp: pip install nose-reportportal[async]')
+        self.endpoint = endpoint
+        self.project = project
+        self.token = token
+        self.concurrency = int(concurrency)
+        self.retries = int(retries)
+        self.verify_ssl = verify_ssl
+        self.base_url_v1 = _uri_join(endpoint, 'api/v1', project)
+        self.base_url_v2 = _uri_join(endpoint, 'api/v2', project)
+        self.launch_id = None
+
+        # client-side id -> asyncio future with the id returned by the server
+        self._ids = {}
+        self._tasks = set()
+        # concurrent future -> (seq, method, kwargs, client id, launch id) of the call
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._seq = 0
+        self._completed = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='rp-async-transport')
+        self._thread.daemon = True
+        self._thread.start()
+        self._call(self._open()).result()
+
+    async def _open(self):
+        self._limiter = _PriorityLimiter(self.concurrency, self._loop)
+        self._session = aiohttp.ClientSession(
+            headers={'Authorization': 'Bearer {0}'.format(self.token)},
+            connector=aiohttp.TCPConnector(limit=self.concurrency, ssl=None if self.verify_ssl else False))
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _submit(self, coro, method, kwargs, client_id=None):
+        future = self._call(self._track(coro))
+        with self._pending_lock:
+            self._seq += 1
+            if not future.done():
+                self._pending[future] = (self._seq, method, kwargs, client_id, self.launch_id)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future):
+        with self._pending_lock:
+            if self._pending.pop(future, None) is not None:
+                self._completed += 1
+
+    async def _track(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        try:
+            return await task
+        except Exception:
+            log.exception('Report Portal request failed')
+        finally:
+            self._tasks.discard(task)
+
+    def _id_future(self, client_id):
+        # Only called from the loop thread, whichever of the start and the
+        # requests depending on it runs first creates the future.
+        future = self._ids.get(client_id)
+        if future is None:
+            future = self._ids[client_id] = self._loop.create_future()
+        return future
+
+    async def _resolve(self, client_id):
+        if client_id is None:
+            return None
+        return await asyncio.shield(self._id_future(client_id))
+
+    async def _request(self, method, url, priority=PRIORITY_ITEM, form=None, **kwargs):
+        """Send a request, again on server and connection errors.
+
+        :param form: function returning the form data, which aiohttp can
+                     only send once
+        """
+        for attempt in range(self.retries + 1):
+            if form is not None:
+                kwargs['data'] = form()
+            await self._limiter.acquire(priority)
+            try:
+                async with self._session.request(method, url, **kwargs) as response:
+                    text = await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status < 500 or attempt == self.retries:
+                    break
+            finally:
+                self._limiter.release()
+            await asyncio.sleep(RETRY_DELAY * 2 ** attempt)
+        data = json.loads(text) if text else {}
+        if response.status >= 400 or 'errorCode' in data:
+            raise ResponseError('{0} {1}: {2}'.format(method, url, text))
+        return data
+
+    async def _start(self, client_id, url, data):
+        future = self._id_future(client_id)
+        try:
+            if 'launchUuid' in data:
+                data['launchUuid'] = await self._resolve(self.launch_id)
+            response = await self._request('POST', url, json=data)
+            future.set_result(response['id'])
+        except Exception as error:
+            future.set_exception(error)
+            raise
+
+    def start_launch(self, name, start_time, description=None, attributes=None,
+                     mode=None, **kwargs):
+        self.launch_id = str(uuid.uuid4())
+        data = {
+            'name': name,
+            'description': description,
+            'attributes': verify_value_length(_dict_to_payload(attributes)),
+            'startTime': start_time,
+            'mode': mode,
+        }
+        self._submit(self._start(self.launch_id, _uri_join(self.base_url_v2, 'launch'), data),
+                     'start_launch', dict(kwargs, name=name, start_time=start_time, description=description,
+                                          attributes=attributes, mode=mode),
+                     self.launch_id)
+        return self.launch_id
+
+    def start_test_item(self, name, start_time, item_type, description=None,
+                        attributes=None, parameters=None, parent_item_id=None,
+                        **kwargs):
+        item_id = str(uuid.uuid4())
+        data = {
+            'name': name,
+            'description': description,
+            'attributes': verify_value_length(_dict_to_payload(attributes)),
+            'startTime': start_time,
+            'launchUuid': self.launch_id,
+            'type': item_type,
+            'parameters': _dict_to_payload(parameters),
+            'hasStats': kwargs.get('has_stats', True),
+            'codeRef': kwargs.get('code_ref'),
+            'testCaseId': kwargs.get('test_case_id'),
+        }
+        self._submit(self._start_item(item_id, data, parent_item_id),
+                     'start_test_item', dict(kwargs, name=name, start_time=start_time, item_type=item_type,
+                                             description=description, attributes=attributes,
+                                             parameters=parameters, parent_item_id=parent_item_id),
+                     item_id)
+        return item_id
+
+    async def _start_item(self, item_id, data, parent_item_id):
+        if parent_item_id:
+            url = _uri_join(self.base_url_v2, 'item', await self._resolve(parent_item_id))
+        else:
+            url = _uri_join(self.base_url_v2, 'item')
+        await self._start(item_id, url, data)
+
+    def finish_test_item(self, item_id, end_time, status, issue=None,
+                         attributes=None, **kwargs):
+        data = {
+            'endTime': end_time,
+            'status': status,
+            'issue': issue,
+            'attributes': verify_value_length(_dict_to_payload(attributes)),
+        }
+        self._submit(self._finish_item(item_id, data),
+                     'finish_test_item', dict(kwargs, item_id=item_id, end_time=end_time, status=status,
+                                              issue=issue, attributes=attributes))
+
+    async def _finish_item(self, item_id, data):
+        server_id = await self._resolve(item_id)
+        data['launchUuid'] = await self._resolve(self.launch_id)
+        await self._request('PUT', _uri_join(self.base_url_v2, 'item', server_id), json=data)
+
+    def log(self, time, message, level=None, attachment=None, item_id=None):
+        data = {
+            'time': time,
+            'message': message,
+            'level': level,
+        }
+        self._submit(self._log(data, attachment, item_id),
+                     'log', {'time': time, 'message': message, 'level': level,
+                             'attachment': attachment, 'item_id': item_id})
+
+    async def _log(self, data, attachment, item_id):
+        data['launchUuid'] = await self._resolve(self.launch_id)
+        if item_id:
+            data['itemUuid'] = await self._resolve(item_id)
+        if attachment:
+            if not isinstance(attachment, dict):
+                attachment = {'data': attachment}
+            name = attachment.get('name', str(uuid.uuid4()))
+            data['file'] = {'name': name}
+        json_part = json.dumps([data])
+
+        def form():
+            form = aiohttp.FormData()
+            form.add_field('json_request_part', json_part, content_type='application/json')
+            if attachment:
+                form.add_field('file', attachment['data'], filename=name,
+                               content_type=attachment.get('mime', 'application/octet-stream'))
+            return form
+
+        await self._request('POST', _uri_join(self.base_url_v2, 'log'), priority=PRIORITY_LOG, form=form)
+
+    def attach_launch(self, launch_id):
+        self.launch_id = launch_id
+        self._call(self._attach(launch_id)).result()
+
+    async def _attach(self, launch_id):
+        # the id of a launch started elsewhere is already the server id
+        future = self._id_future(launch_id)
+        if not future.done():
+            future.set_result(launch_id)
+
+    def finish_launch(self, end_time, status=None, attributes=None, **kwargs):
+        data = {
+            'endTime': end_time,
+            'status': status,
+            'attributes': verify_value_length(_dict_to_payload(attributes)),
+        }
+        # terminate() waits for it, within its deadline
+        self._submit(self._finish_launch(data),
+                     'finish_launch', dict(kwargs, end_time=end_time, status=status, attributes=attributes))
+
+    async def _finish_launch(self, data):
+        current = asyncio.current_task() if hasattr(asyncio, 'current_task') else asyncio.Task.current_task()
+        await asyncio.gather(*[task for task in self._tasks if task is not current], return_exceptions=True)
+        server_id = await self._resolve(self.launch_id)
+        return await self._request('PUT', _uri_join(self.base_url_v2, 'launch', server_id, 'finish'), json=data)
+
+    def get_project_settings(self):
+        return self._call(self._request('GET', _uri_join(self.base_url_v1, 'settings'))).result()
+
+    def terminate(self, nowait=False, timeout=None, spill_path=None, progress=None):
+        """Wait for the requests in flight and close the transport.
+
+        :param timeout: seconds to wait at most, None to wait for all requests
+        :param spill_path: file the calls left after ``timeout`` are appended
+                           to, in the journal format
+        :param progress: called every second with the number of requests
+                         left and the number of requests sent per second
+        :return: number of calls left unsent
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        last_time, last_completed = monotonic(), self._completed
+        while True:
+            with self._pending_lock:
+                pending = list(self._pending)
+            remaining = None if deadline is None else deadline - monotonic()
+            if not pending or (remaining is not None and remaining <= 0):
+                break
+            concurrent.futures.wait(pending, timeout=1.0 if remaining is None else min(1.0, remaining),
+                                    return_when=concurrent.futures.ALL_COMPLETED)
+            if progress is not None:
+                now, completed = monotonic(), self._completed
+                with self._pending_lock:
+                    left = len(self._pending)
+                progress(left, (completed - last_completed) / max(now - last_time, 1e-6))
+                last_time, last_completed = now, completed
+
+        with self._pending_lock:
+            left = sorted(self._pending.values())
+            futures = list(self._pending)
+        for future in futures:
+            future.cancel()
+        if left:
+            if spill_path:
+                self._spill(spill_path, left)
+            log.warning('Report Portal - %s requests were not sent before the deadline%s', len(left),
+                        ', they were saved to {0}'.format(spill_path) if spill_path else '')
+        self._call(self._session.close()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        return len(left)
+
+    def _server_id(self, client_id):
+        future = self._ids.get(client_id)
+        if future is not None and future.done() and not future.cancelled() and future.exception() is None:
+            return future.result()
+        return client_id
+
+    def _spill(self, path, calls):
+        # Ids of the launches and items started are replaced by the ids
+        # the server gave them, the others are mapped when replayed.
+        with io.open(path, 'a', encoding='utf-8') as f:
+            for seq, method, kwargs, client_id, launch_id in calls:
+                kwargs = dict(kwargs)
+                for key in ('item_id', 'parent_item_id'):
+                    if kwargs.get(key):
+                        kwargs[key] = self._server_id(kwargs[key])
+                entry = {'seq': seq, 'call': method, 'launch': self._server_id(launch_id), 'kwargs': _dump(kwargs)}
+                if client_id is not None:
+                    entry['id'] = client_id
+                f.write(json.dumps(entry) + u'\n')
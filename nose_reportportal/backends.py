@@ -0,0 +1,282 @@
+#  Copyright (c) 2019 http://reportportal.io
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Reporting backends used by :class:`nose_reportportal.service.NoseServiceClass`.
+
+A backend exposes the same calls as ``reportportal_client.ReportPortalService``
+(launch, item, log and attachment reporting plus ``terminate`` to flush),
+so the Report Portal client itself is the default backend. The local
+backends below let the plugin run without a server.
+"""
+
+import base64
+import importlib
+import inspect
+import io
+import json
+import logging
+import threading
+import uuid
+
+import six
+from reportportal_client import ReportPortalService
+
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class ReportingBackend(object):
+    """Interface of a reporting backend."""
+
+    def start_launch(self, name, start_time, description=None, attributes=None,
+                     mode=None, **kwargs):
+        raise NotImplementedError
+
+    def finish_launch(self, end_time, status=None, attributes=None, **kwargs):
+        raise NotImplementedError
+
+    def start_test_item(self, name, start_time, item_type, description=None,
+                        attributes=None, parameters=None, parent_item_id=None,
+                        **kwargs):
+        raise NotImplementedError
+
+    def finish_test_item(self, item_id, end_time, status, issue=None,
+                         attributes=None, **kwargs):
+        raise NotImplementedError
+
+    def log(self, time, message, level=None, attachment=None, item_id=None):
+        raise NotImplementedError
+
+    def attach_launch(self, launch_id):
+        """Report to the launch ``launch_id`` started by another process."""
+        self.launch_id = launch_id
+
+    def get_project_settings(self):
+        return {}
+
+    def terminate(self, nowait=False, timeout=None, spill_path=None, progress=None):
+        """Flush all pending data.
+
+        The keyword arguments are optional, a backend whose ``terminate``
+        only takes ``nowait`` doesn't get them, see :func:`terminate`.
+
+        :param timeout: seconds to wait at most for the requests in flight
+        :param spill_path: file the calls left after ``timeout`` are saved to
+        :param progress: called with the number of requests left and the
+                         number of requests sent per second while waiting
+        :return: number of calls left unsent
+        """
+
+
+class _RecordingBackend(ReportingBackend):
+    """Turns every call into an event dict and passes it to ``_record``."""
+
+    def __init__(self, **kwargs):
+        self.launch_id = None
+
+    def _record(self, event):
+        raise NotImplementedError
+
+    def start_launch(self, name, start_time, description=None, attributes=None,
+                     mode=None, **kwargs):
+        self.launch_id = str(uuid.uuid4())
+        self._record({
+            'event': 'start_launch',
+            'launch_id': self.launch_id,
+            'name': name,
+            'start_time': start_time,
+            'description': description,
+            'attributes': attributes,
+            'mode': mode,
+        })
+        return self.launch_id
+
+    def finish_launch(self, end_time, status=None, attributes=None, **kwargs):
+        self._record({
+            'event': 'finish_launch',
+            'launch_id': self.launch_id,
+            'end_time': end_time,
+            'status': status,
+            'attributes': attributes,
+        })
+
+    def start_test_item(self, name, start_time, item_type, description=None,
+                        attributes=None, parameters=None, parent_item_id=None,
+                        **kwargs):
+        item_id = str(uuid.uuid4())
+        self._record({
+            'event': 'start_test_item',
+            'item_id': item_id,
+            'parent_item_id': parent_item_id,
+            'name': name,
+            'start_time': start_time,
+            'item_type': item_type,
+            'description': description,
+            'attributes': attributes,
+            'parameters': parameters,
+            'code_ref': kwargs.get('code_ref'),
+            'test_case_id': kwargs.get('test_case_id'),
+        })
+        return item_id
+
+    def finish_test_item(self, item_id, end_time, status, issue=None,
+                         attributes=None, **kwargs):
+        self._record({
+            'event': 'finish_test_item',
+            'item_id': item_id,
+            'end_time': end_time,
+            'status': status,
+            'issue': issue,
+            'attributes': attributes,
+        })
+
+    def log(self, time, message, level=None, attachment=None, item_id=None):
+        self._record({
+            'event': 'log',
+            'item_id': item_id,
+            'time': time,
+            'message': message,
+            'level': level,
+            'attachment': attachment,
+        })
+
+
+class MemoryBackend(_RecordingBackend):
+    """Keeps all reported events in the ``events`` list."""
+
+    def __init__(self, **kwargs):
+        super(MemoryBackend, self).__init__(**kwargs)
+        self.events = []
+
+    def _record(self, event):
+        self.events.append(event)
+
+
+class FileBackend(_RecordingBackend):
+    """Appends every reported event as a JSON line to ``path``.
+
+    Attachment content is stored base64 encoded.
+    """
+
+    def __init__(self, path='rp_launch.jsonl', **kwargs):
+        super(FileBackend, self).__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = io.open(path, 'a', encoding='utf-8')
+
+    def _record(self, event):
+        attachment = event.get('attachment')
+        if attachment:
+            event['attachment'] = _encode_attachment(attachment)
+        line = six.text_type(json.dumps(event, default=six.text_type)) + u'\n'
+        with self._lock:
+            self._file.write(line)
+
+    def terminate(self, *args, **kwargs):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def _encode_attachment(attachment):
+    if not isinstance(attachment, dict):
+        attachment = {'data': attachment}
+    data = attachment.get('data')
+    if hasattr(data, 'read'):
+        data = data.read()
+    if isinstance(data, six.text_type):
+        data = data.encode('utf-8')
+    return {
+        'name': attachment.get('name'),
+        'mime': attachment.get('mime', 'application/octet-stream'),
+        'data': base64.b64encode(data or b'').decode('ascii'),
+    }
+
+
+BACKENDS = {
+    'reportportal': ReportPortalService,
+    'memory': MemoryBackend,
+    'file': FileBackend,
+    # imported on demand, needs Python 3 and aiohttp
+    'async': 'nose_reportportal.aio.AsyncBackend',
+}
+
+
+def attach_launch(backend, launch_id):
+    """Make ``backend`` report to the launch ``launch_id`` started elsewhere.
+
+    ``ReportPortalService`` has no ``attach_launch``, setting its launch id
+    is enough.
+    """
+    attach = getattr(backend, 'attach_launch', None)
+    if attach is not None:
+        attach(launch_id)
+    else:
+        backend.launch_id = launch_id
+
+
+def _keyword_arguments(function):
+    """Names of the arguments of ``function``, None when it takes ``**kwargs``."""
+    try:
+        parameters = inspect.signature(function).parameters.values()
+    except AttributeError:
+        # Python 2
+        spec = inspect.getargspec(function)
+        return None if spec.keywords else set(spec.args)
+    if any(parameter.kind == parameter.VAR_KEYWORD for parameter in parameters):
+        return None
+    return set(parameter.name for parameter in parameters)
+
+
+def terminate(backend, nowait=False, **options):
+    """Terminate ``backend`` with the ``options`` its ``terminate`` accepts.
+
+    Backends written for older versions only accept ``nowait``.
+
+    :return: number of calls left unsent, None when the backend doesn't tell
+    """
+    accepted = _keyword_arguments(backend.terminate)
+    if accepted is not None:
+        options = dict((name, value) for name, value in options.items() if name in accepted)
+    return backend.terminate(nowait, **options)
+
+
+def create_backend(name, **kwargs):
+    """Create the backend registered as ``name``.
+
+    :param name: one of the keys of :data:`BACKENDS` or the dotted path
+                 of a backend class
+    :param kwargs: constructor arguments of the backend
+    """
+    backend_class = BACKENDS.get(name, name)
+    if isinstance(backend_class, six.string_types):
+        module_name, _, class_name = backend_class.rpartition('.')
+        try:
+            backend_class = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError, ValueError):
+            raise ValueError('Unknown reporting backend {0!r}. Available backends: {1}.'
+                             .format(name, ', '.join(sorted(BACKENDS))))
+    return backend_class(**kwargs)
+
+
+def backend_from_config(config, name=None):
+    """Create the backend of the :class:`nose_reportportal.config.Config` ``config``.
+
+    :param name: backend used instead of the configured ``rp_backend``
+    """
+    return create_backend(name or config.rp_backend,
+                          endpoint=config.rp_endpoint,
+                          project=config.rp_project,
+                          token=config.rp_uuid)
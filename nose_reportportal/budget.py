@@ -0,0 +1,119 @@
+#  Copyright (c) 2019 http://reportportal.io
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import gzip
+import io
+
+
+class _Overflow(object):
+    """Log records of one item compressed as they come."""
+
+    def __init__(self):
+        self.records = 0
+        self._buf = io.BytesIO()
+        self._gzip = gzip.GzipFile(fileobj=self._buf, mode='wb')
+
+    def write(self, line):
+        self.records += 1
+        self._gzip.write(line)
+
+    def close(self):
+        self._gzip.close()
+        return self._buf.getvalue()
+
+
+class PayloadBudget(object):
+    """Limits the size of the log messages sent inline.
+
+    Once the messages of an item, or of the whole launch, exceed their
+    budget, the following ones are compressed into a single attachment
+    sent when the item (or the launch) finishes. Attachments are counted
+    but always sent.
+
+    :param launch_bytes: budget of the launch, None for no limit
+    :param item_bytes: budget of each item, None for no limit
+    """
+
+    def __init__(self, launch_bytes=None, item_bytes=None):
+        self.launch_bytes = launch_bytes
+        self.item_bytes = item_bytes
+        self.used = 0
+        self.inline_records = 0
+        self.overflow_records = 0
+        self.overflow_bytes = 0
+        self.compressed_bytes = 0
+        self._launch_exceeded = False
+        # item id -> bytes sent inline
+        self._items = {}
+        # item id -> _Overflow, None for the launch
+        self._overflows = {}
+
+    def _fits(self, item_id, size):
+        if self._launch_exceeded or item_id in self._overflows:
+            return False
+        if self.launch_bytes is not None and self.used + size > self.launch_bytes:
+            self._launch_exceeded = True
+            return False
+        if (item_id is not None and self.item_bytes is not None
+                and self._items.get(item_id, 0) + size > self.item_bytes):
+            return False
+        return True
+
+    def allow(self, item_id, size):
+        """Account for a message of ``size`` bytes and tell whether it can be sent inline."""
+        if not self._fits(item_id, size):
+            return False
+        self.used += size
+        self.inline_records += 1
+        if item_id is not None:
+            self._items[item_id] = self._items.get(item_id, 0) + size
+        return True
+
+    def add_attachment(self, size):
+        self.used += size
+
+    def overflow(self, item_id, line):
+        """Keep ``line`` for the attachment of ``item_id``."""
+        overflow = self._overflows.get(item_id)
+        if overflow is None:
+            overflow = self._overflows[item_id] = _Overflow()
+        overflow.write(line)
+        self.overflow_records += 1
+        self.overflow_bytes += len(line)
+
+    def pop_overflow(self, item_id):
+        """Return ``(records, gzipped data)`` kept for ``item_id``, or None."""
+        self._items.pop(item_id, None)
+        overflow = self._overflows.pop(item_id, None)
+        if overflow is None:
+            return None
+        data = overflow.close()
+        self.compressed_bytes += len(data)
+        self.used += len(data)
+        return overflow.records, data
+
+    def attributes(self):
+        """Usage of the budget, reported as attributes of the launch."""
+        return {
+            'payload_bytes': self.used,
+            'inline_log_records': self.inline_records,
+            'compressed_log_records': self.overflow_records,
+            'compressed_log_bytes': self.overflow_bytes,
+            'compressed_log_gzip_bytes': self.compressed_bytes,
+        }
+
+    def report(self):
+        return ('Payload: {0.used} bytes, {0.inline_records} log records sent inline, '
+                '{0.overflow_records} log records ({0.overflow_bytes} bytes) over the budget '
+                'compressed to {0.compressed_bytes} bytes'.format(self))
@@ -0,0 +1,101 @@
+#  Copyright (c) 2019 http://reportportal.io
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import os
+import sys
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _flush():
+    for stream in (sys.stdout, sys.stderr, sys.__stdout__, sys.__stderr__):
+        try:
+            stream.flush()
+        except (AttributeError, ValueError):
+            pass
+
+
+class FDCapture(object):
+    """Captures the output written to file descriptors 1 and 2.
+
+    Unlike swapping ``sys.stdout``, this catches the output of
+    subprocesses and C extensions. Both descriptors are redirected to one
+    temporary file, reused by every test, so stdout and stderr stay
+    interleaved in the order they were written.
+
+    :param max_bytes: size above which only the beginning and the end of
+                      the output are kept
+    """
+
+    def __init__(self, max_bytes=1024 * 1024, fds=(1, 2)):
+        self.max_bytes = max_bytes
+        self.fds = fds
+        self._file = None
+        self._saved = None
+
+    @property
+    def active(self):
+        return self._saved is not None
+
+    def start(self):
+        if self._file is None:
+            self._file = tempfile.TemporaryFile()
+        fd = self._file.fileno()
+        os.ftruncate(fd, 0)
+        os.lseek(fd, 0, os.SEEK_SET)
+        _flush()
+        self._saved = [os.dup(target) for target in self.fds]
+        for target in self.fds:
+            os.dup2(fd, target)
+
+    def stop(self):
+        """Restore the descriptors and return the captured output as bytes."""
+        if not self.active:
+            return b''
+        _flush()
+        for target, saved in zip(self.fds, self._saved):
+            os.dup2(saved, target)
+            os.close(saved)
+        self._saved = None
+        return self._read()
+
+    def _read_range(self, start, size):
+        fd = self._file.fileno()
+        os.lseek(fd, start, os.SEEK_SET)
+        chunks = []
+        while size > 0:
+            chunk = os.read(fd, min(CHUNK_SIZE, size))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def _read(self):
+        size = os.fstat(self._file.fileno()).st_size
+        if size <= self.max_bytes:
+            return self._read_range(0, size)
+        half = self.max_bytes // 2
+        return b''.join([
+            self._read_range(0, half),
+            '\n... {0} bytes truncated ...\n'.format(size - 2 * half).encode('ascii'),
+            self._read_range(size - half, half),
+        ])
+
+    def close(self):
+        self.stop()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
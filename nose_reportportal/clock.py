@@ -0,0 +1,35 @@
+#  Copyright (c) 2019 http://reportportal.io
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from time import time
+
+try:
+    from time import monotonic
+except ImportError:
+    # Python 2 has no monotonic clock
+    monotonic = time
+
+
+# Wall clock time of the monotonic clock's zero, in milliseconds. Reading
+# the monotonic clock keeps durations right when the wall clock jumps.
+_EPOCH_MS = int(time() * 1000) - int(monotonic() * 1000)
+
+
+def timestamp():
+    """Current time as integer milliseconds since the epoch.
+
+    Timestamps are kept as integers until they're serialized, Report
+    Portal accepts them as JSON numbers.
+    """
+    return _EPOCH_MS + int(monotonic() * 1000)
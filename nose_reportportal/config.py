@@ -0,0 +1,201 @@
+#  Copyright (c) 2019 http://reportportal.io
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Settings of the plugin.
+
+Every setting is resolved, by order of precedence, from the command line,
+from an ``RP_*`` environment variable (``rp_sample_rate`` is read from
+``RP_SAMPLE_RATE``), from the ``base`` section of the config file and
+from its default. Settings are validated once when they are loaded; the
+resolved :class:`Config` is serialized to be handed to worker processes,
+which don't parse the config file again.
+"""
+
+import json
+import os
+
+from six.moves import configparser
+
+_BOOLEANS = {'1': True, 'yes': True, 'true': True, 'on': True,
+             '0': False, 'no': False, 'false': False, 'off': False}
+
+
+class ConfigError(ValueError):
+    """Invalid setting."""
+
+
+class Setting(object):
+    """A setting, its type, its default and the values it accepts."""
+
+    __slots__ = ('name', 'default', 'type', 'choices', 'minimum', 'maximum')
+
+    def __init__(self, name, default, type=str, choices=None, minimum=None, maximum=None):
+        self.name = name
+        self.default = default
+        self.type = type
+        self.choices = choices
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @property
+    def env_name(self):
+        return self.name.upper()
+
+    def parse(self, value, source):
+        """Convert the string ``value`` read from ``source`` and validate it."""
+        try:
+            if self.type is bool:
+                parsed = value if isinstance(value, bool) else _BOOLEANS[value.strip().lower()]
+            else:
+                parsed = self.type(value)
+        except (KeyError, TypeError, ValueError):
+            raise ConfigError('{0} from {1} must be a {2}, got {3!r}'
+                              .format(self.name, source, self.type.__name__, value))
+        if self.choices is not None and parsed not in self.choices:
+            raise ConfigError('{0} from {1} must be one of {2}, got {3!r}'
+                              .format(self.name, source, ', '.join(repr(c) for c in self.choices), value))
+        if ((self.minimum is not None and parsed < self.minimum)
+                or (self.maximum is not None and parsed > self.maximum)):
+            raise ConfigError('{0} from {1} must be between {2} and {3}, got {4!r}'
+                              .format(self.name, source, self.minimum, self.maximum, value))
+        return parsed
+
+
+SETTINGS = (
+    # Report Portal
+    Setting('rp_uuid', ''),
+    Setting('rp_endpoint', ''),
+    Setting('rp_project', ''),
+    Setting('rp_launch', '{}'),
+    Setting('rp_launch_tags', ''),
+    Setting('rp_launch_description', ''),
+    Setting('rp_launch_id', ''),
+    Setting('rp_mode', 'DEFAULT', choices=('DEFAULT', 'DEBUG')),
+    Setting('rp_export_endpoint', False, bool),
+    # transport and batching
+    Setting('rp_backend', 'reportportal'),
+    Setting('rp_backend_path', 'rp_launch.jsonl'),
+    Setting('rp_async_concurrency', 10, int, minimum=1),
+    Setting('rp_log_batch_size', 20, int, minimum=1),
+    Setting('rp_retries', 0, int, minimum=0),
+    Setting('rp_journal_path', ''),
+    Setting('rp_shutdown_timeout', 0.0, float, minimum=0.0),
+    Setting('rp_spill_path', 'rp_spill.jsonl'),
+    # capture
+    Setting('rp_ignore_loggers', ''),
+    Setting('rp_capture', 'sys', choices=('sys', 'fd')),
+    Setting('rp_capture_max_kb', 1024, int, minimum=1),
+    Setting('rp_log_budget_launch_kb', 0, int, minimum=0),
+    Setting('rp_log_budget_item_kb', 0, int, minimum=0),
+    # sampling and measurements
+    Setting('rp_sample_rate', 1.0, float, minimum=0.0, maximum=1.0),
+    Setting('rp_resource_usage', False, bool),
+    Setting('rp_resource_top', 10, int, minimum=0),
+    Setting('rp_profiler', '', choices=('', 'cprofile', 'sampling')),
+    Setting('rp_profile_threshold_ms', 1000, int, minimum=0),
+    Setting('rp_profile_interval_ms', 5.0, float, minimum=0.1),
+    Setting('rp_known_issues', ''),
+)
+
+SETTINGS_BY_NAME = dict((setting.name, setting) for setting in SETTINGS)
+
+
+class Config(object):
+    """Resolved settings, available as attributes.
+
+    :param values: setting name -> value
+    :param log_levels: logger name -> level, from the ``log_levels`` section
+    :param attr_launch_names: ``(postfix, attr expression)`` pairs of the
+                              ``attr_launch_names`` section, None when the
+                              section is missing
+    """
+
+    def __init__(self, values, log_levels=None, attr_launch_names=None):
+        self.values = values
+        self.log_levels = log_levels
+        self.attr_launch_names = attr_launch_names
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['values'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    @classmethod
+    def load(cls, path=None, env=None, overrides=None):
+        """Resolve the settings.
+
+        :param path: config file path
+        :param env: environment variables, ``os.environ`` by default
+        :param overrides: setting name -> value given on the command line
+        """
+        env = os.environ if env is None else env
+        overrides = overrides or {}
+        for name in overrides:
+            if name not in SETTINGS_BY_NAME:
+                raise ConfigError('Unknown setting {0!r}'.format(name))
+
+        parser = configparser.ConfigParser()
+        # logger names are case sensitive
+        parser.optionxform = str
+        if path:
+            parser.read(path)
+
+        values = {}
+        for setting in SETTINGS:
+            if setting.name in overrides:
+                values[setting.name] = setting.parse(overrides[setting.name], 'the command line')
+            elif setting.env_name in env:
+                values[setting.name] = setting.parse(env[setting.env_name], setting.env_name)
+            elif parser.has_option('base', setting.name):
+                values[setting.name] = setting.parse(parser.get('base', setting.name, raw=True), path)
+            else:
+                values[setting.name] = setting.default
+        if values['rp_journal_path'] and values['rp_backend'] == 'async':
+            # the async backend returns before sending, calls would be
+            # acknowledged in the journal before they reach the server
+            raise ConfigError('rp_journal_path is not supported by the async backend, '
+                              'which saves the requests left at the end of the run to rp_spill_path')
+
+        log_levels = None
+        if parser.has_section('log_levels'):
+            log_levels = dict(parser.items('log_levels', raw=True))
+        attr_launch_names = None
+        if parser.has_section('attr_launch_names'):
+            attr_launch_names = parser.items('attr_launch_names', raw=True)
+        return cls(values, log_levels, attr_launch_names)
+
+    def dumps(self):
+        return json.dumps({'values': self.values,
+                           'log_levels': self.log_levels,
+                           'attr_launch_names': self.attr_launch_names})
+
+    @classmethod
+    def loads(cls, data):
+        data = json.loads(data)
+        attr_launch_names = data['attr_launch_names']
+        if attr_launch_names is not None:
+            attr_launch_names = [tuple(pair) for pair in attr_launch_names]
+        return cls(data['values'], data['log_levels'], attr_launch_names)
+
+
+def parse_overrides(options):
+    """Turn ``NAME=VALUE`` strings into a dict of overridden settings."""
+    overrides = {}
+    for option in options or []:
+        name, sep, value = option.partition('=')
+        if not sep:
+            raise ConfigError('Expected NAME=VALUE, got {0!r}'.format(option))
+        overrides[name.strip()] = value.strip()
+    return overrides
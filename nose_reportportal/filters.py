@@ -0,0 +1,93 @@
+#  Copyright (c) 2019 http://reportportal.io
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import logging
+import re
+
+
+def _pattern_to_regex(pattern):
+    """Translate a logger pattern to a regex matching the logger and its children.
+
+    ``*`` and ``?`` are glob wildcards, any other character matches itself.
+    """
+    parts = []
+    for char in pattern:
+        if char == '*':
+            parts.append('.*')
+        elif char == '?':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return ''.join(parts) + r'(?:\..*)?\Z'
+
+
+def _compile(patterns):
+    if not patterns:
+        return None
+    return re.compile('|'.join('(?:{0})'.format(_pattern_to_regex(p)) for p in patterns))
+
+
+def _level(value):
+    if isinstance(value, int):
+        return value
+    level = logging.getLevelName(value.strip().upper())
+    if not isinstance(level, int):
+        raise ValueError('Unknown log level {0!r}'.format(value))
+    return level
+
+
+class LoggerMatcher(object):
+    """Decides which log records are reported, by logger name and level.
+
+    Filters use the syntax of nose's ``--logging-filter``: ``foo`` includes
+    the ``foo`` logger and its children, ``-foo`` excludes them. Patterns
+    may contain ``*`` and ``?`` wildcards. ``levels`` maps logger patterns
+    to the minimal level reported for them, the longest matching pattern
+    wins.
+
+    All patterns are compiled to regexes once and the verdict for every
+    logger name is cached, so a record costs a single dict lookup.
+    """
+
+    def __init__(self, filters=None, levels=None):
+        filters = [f.strip() for f in filters or [] if f.strip()]
+        self._include = _compile([f for f in filters if not f.startswith('-')])
+        self._exclude = _compile([f[1:] for f in filters if f.startswith('-')])
+        self._levels = sorted(
+            ((re.compile(_pattern_to_regex(pattern)), _level(level), len(pattern))
+             for pattern, level in (levels or {}).items()),
+            key=lambda entry: entry[2], reverse=True)
+        self._cache = {}
+
+    def _threshold(self, name):
+        if self._include is not None and not self._include.match(name):
+            return None
+        if self._exclude is not None and self._exclude.match(name):
+            return None
+        for regex, level, _ in self._levels:
+            if regex.match(name):
+                return level
+        return logging.NOTSET
+
+    def threshold(self, name):
+        """Return the minimal reported level for ``name``, None if it is filtered out."""
+        try:
+            return self._cache[name]
+        except KeyError:
+            threshold = self._cache[name] = self._threshold(name)
+            return threshold
+
+    def allow(self, record):
+        threshold = self.threshold(record.name)
+        return threshold is not None and record.levelno >= threshold
@@ -0,0 +1,333 @@
+#  Copyright (c) 2019 http://reportportal.io
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Write-ahead journal of the calls made to a reporting backend.
+
+Every call is appended to the journal file before it is passed to the
+backend and acknowledged once the backend has accepted it. When the test
+process dies before ``terminate``, the next run (or
+``python -m nose_reportportal.journal``) replays the calls which were not
+acknowledged and finishes the items and launches left in progress.
+
+A process holds an exclusive lock on its journal until ``terminate``. When
+another process, such as a multiprocess worker, already holds the journal,
+it writes a journal of its own next to it. Only the journals nobody holds
+are recovered.
+"""
+
+import base64
+import io
+import json
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+from .backends import ReportingBackend, _encode_attachment, attach_launch, terminate
+from .clock import timestamp
+
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+INTERRUPTED = 'INTERRUPTED'
+
+
+def _dump(kwargs):
+    kwargs = dict(kwargs)
+    if kwargs.get('attachment'):
+        kwargs['attachment'] = _encode_attachment(kwargs['attachment'])
+    return kwargs
+
+
+def _load(kwargs):
+    attachment = kwargs.get('attachment')
+    if attachment:
+        attachment['data'] = base64.b64decode(attachment['data'])
+    return kwargs
+
+
+def _lock(path):
+    """Lock the journal at ``path`` for this process.
+
+    :return: the open lock file, None when another process holds the journal
+    """
+    lock_file = io.open(path + '.lock', 'a+b')
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except (IOError, OSError):
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def _unlock(lock_file, path):
+    try:
+        os.remove(path + '.lock')
+    except OSError:
+        # Windows doesn't remove open files
+        pass
+    lock_file.close()
+
+
+def read_journal(path):
+    """Return the calls and the acknowledgements stored in the journal at ``path``."""
+    calls, acks = {}, {}
+    with io.open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # the last line is cut when the process died while writing it
+                continue
+            if 'ack' in entry:
+                acks[entry['ack']] = entry.get('result')
+            else:
+                calls[entry['seq']] = entry
+    return calls, acks
+
+
+class JournalBackend(ReportingBackend):
+    """Journals all calls to ``backend`` in the append-only file ``path``.
+
+    Each entry is flushed to the operating system as soon as it's written,
+    so the journal survives the test process being killed. When another
+    process holds ``path``, the journal is written to ``<path>.pid<pid>``.
+    """
+
+    def __init__(self, backend, path):
+        self.backend = backend
+        self.base_path = path
+        self._lock_file = _lock(path)
+        if self._lock_file is None:
+            own_path = '{0}.pid{1}'.format(path, os.getpid())
+            log.warning('Report Portal - the journal %s is used by another process, writing %s instead',
+                        path, own_path)
+            path = own_path
+            self._lock_file = _lock(path)
+        self.path = path
+        self._lock = threading.Lock()
+        self._seq = 0
+        # logs buffered by the backend, acknowledged once it sent them
+        self._unsent = []
+        self._file = io.open(path, 'a', encoding='utf-8')
+
+    @property
+    def launch_id(self):
+        return self.backend.launch_id
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + u'\n')
+        self._file.flush()
+
+    def _call(self, method, kwargs):
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            self._write({'seq': seq, 'call': method,
+                         'launch': getattr(self.backend, 'launch_id', None),
+                         'kwargs': _dump(kwargs)})
+        result = getattr(self.backend, method)(**kwargs)
+        with self._lock:
+            # ReportPortalService keeps logs in a batch until it's full
+            buffered = getattr(self.backend, '_batch_logs', None)
+            if method == 'log' and buffered:
+                self._unsent.append(seq)
+                return result
+            if not buffered:
+                for unsent in self._unsent:
+                    self._write({'ack': unsent})
+                self._unsent = []
+            entry = {'ack': seq}
+            if method in ('start_launch', 'start_test_item'):
+                entry['result'] = result
+            self._write(entry)
+        return result
+
+    def start_launch(self, name, start_time, description=None, attributes=None,
+                     mode=None, **kwargs):
+        kwargs.update(name=name, start_time=start_time, description=description,
+                      attributes=attributes, mode=mode)
+        return self._call('start_launch', kwargs)
+
+    def finish_launch(self, end_time, status=None, attributes=None, **kwargs):
+        kwargs.update(end_time=end_time, status=status, attributes=attributes)
+        return self._call('finish_launch', kwargs)
+
+    def start_test_item(self, name, start_time, item_type, description=None,
+                        attributes=None, parameters=None, parent_item_id=None,
+                        **kwargs):
+        kwargs.update(name=name, start_time=start_time, item_type=item_type,
+                      description=description, attributes=attributes,
+                      parameters=parameters, parent_item_id=parent_item_id)
+        return self._call('start_test_item', kwargs)
+
+    def finish_test_item(self, item_id, end_time, status, issue=None,
+                         attributes=None, **kwargs):
+        kwargs.update(item_id=item_id, end_time=end_time, status=status,
+                      issue=issue, attributes=attributes)
+        return self._call('finish_test_item', kwargs)
+
+    def log(self, time, message, level=None, attachment=None, item_id=None):
+        return self._call('log', {'time': time, 'message': message, 'level': level,
+                                  'attachment': attachment, 'item_id': item_id})
+
+    def attach_launch(self, launch_id):
+        attach_launch(self.backend, launch_id)
+
+    def get_project_settings(self):
+        return self.backend.get_project_settings()
+
+    def terminate(self, *args, **kwargs):
+        left = terminate(self.backend, *args, **kwargs)
+        with self._lock:
+            self._file.close()
+            if not left and not getattr(self.backend, '_batch_logs', None):
+                # everything was sent, the journal is not needed anymore
+                os.remove(self.path)
+            _unlock(self._lock_file, self.path)
+        return left
+
+    def recover(self):
+        """Replay the calls left unacknowledged in the journals nobody holds.
+
+        These are the journal of this process, left by a previous run, and
+        the journals of other processes which died.
+
+        :return: number of replayed calls
+        """
+        with self._lock:
+            self._file.close()
+            replayed = self._recover(self.path)
+            self._file = io.open(self.path, 'a', encoding='utf-8')
+            for path in self._other_journals():
+                lock_file = _lock(path)
+                if lock_file is None:
+                    continue
+                try:
+                    replayed += self._recover(path)
+                finally:
+                    _unlock(lock_file, path)
+        return replayed
+
+    def _other_journals(self):
+        directory, name = os.path.split(self.base_path)
+        prefix = name + '.pid'
+        for entry in sorted(os.listdir(directory or '.')):
+            path = os.path.join(directory, entry)
+            if entry.startswith(prefix) and not entry.endswith('.lock') and path != self.path:
+                yield path
+
+    def _recover(self, path):
+        try:
+            replayed = replay(path, self.backend)
+        except Exception:
+            # keep the journal of the broken run for a later recovery
+            kept = '{0}.{1}'.format(path, timestamp())
+            os.rename(path, kept)
+            log.exception('Failed to recover the journal, it was kept in %s', kept)
+            replayed = 0
+        else:
+            os.remove(path)
+        self.backend.launch_id = None
+        return replayed
+
+
+def replay(path, backend):
+    """Send the unacknowledged calls of the journal at ``path`` to ``backend``.
+
+    Items and launches left in progress are finished as interrupted.
+
+    :return: number of replayed calls
+    """
+    calls, acks = read_journal(path)
+    started_launches, finished_launches = [], set()
+    # item id -> launch id
+    items = {}
+    # client-side id of a spilled start -> id of the replayed start
+    ids = {}
+    replayed = 0
+    for seq in sorted(calls):
+        entry = calls[seq]
+        method, kwargs = entry['call'], _load(entry['kwargs'])
+        launch = ids.get(entry['launch'], entry['launch'])
+        for key in ('item_id', 'parent_item_id'):
+            if kwargs.get(key) in ids:
+                kwargs[key] = ids[kwargs[key]]
+        if seq in acks:
+            result = acks[seq]
+        else:
+            backend.launch_id = launch
+            result = getattr(backend, method)(**kwargs)
+            replayed += 1
+        if 'id' in entry:
+            ids[entry['id']] = result
+        if method == 'start_launch':
+            started_launches.append(result)
+        elif method == 'finish_launch':
+            finished_launches.add(launch)
+        elif method == 'start_test_item':
+            items[result] = launch
+        elif method == 'finish_test_item':
+            items.pop(kwargs['item_id'], None)
+
+    # launches attached by shards are finished by the coordinator, only their items are
+    attached_launches = set(items.values()).difference(started_launches)
+    for launch in started_launches + sorted(attached_launches):
+        if launch in finished_launches:
+            continue
+        backend.launch_id = launch
+        for item_id in [i for i, l in items.items() if l == launch]:
+            backend.finish_test_item(item_id=item_id, end_time=timestamp(), status=INTERRUPTED)
+        if launch not in attached_launches:
+            backend.finish_launch(end_time=timestamp(), status=INTERRUPTED)
+        replayed += 1
+    return replayed
+
+
+def main(argv=None):
+    import argparse
+    from .backends import backend_from_config
+    from .config import Config
+
+    parser = argparse.ArgumentParser(
+        prog='python -m nose_reportportal.journal',
+        description='Send the reports left in a journal by an interrupted test run.')
+    parser.add_argument('journal', help='journal file path')
+    parser.add_argument('--rp-config-file', required=True, dest='rp_config', help='config file path')
+    args = parser.parse_args(argv)
+
+    lock_file = _lock(args.journal)
+    if lock_file is None:
+        parser.error('{0} is used by a running test process'.format(args.journal))
+    backend = backend_from_config(Config.load(args.rp_config))
+    replayed = replay(args.journal, backend)
+    backend.terminate()
+    os.remove(args.journal)
+    _unlock(lock_file, args.journal)
+    print('Replayed {0} calls from {1}'.format(replayed, args.journal))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+#  Copyright (c) 2019 http://reportportal.io
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import inspect
+import unittest
+
+import six
+
+from nose.case import FunctionTestCase, MethodTestCase
+from nose.util import safe_str
+
+# attributes of test functions and classes which don't come from @attr
+NOT_ATTRIBUTES = frozenset(['suites', 'description', 'compat_func_name'])
+
+_SCALARS = six.string_types + six.integer_types + (float,)
+
+
+class TestMetadata(object):
+    """Item fields shared by all cases of a test function or method."""
+
+    __slots__ = ('description', 'attributes', 'code_ref', 'arg_names')
+
+    def __init__(self, description, attributes, code_ref, arg_names=()):
+        self.description = description
+        self.attributes = attributes
+        self.code_ref = code_ref
+        self.arg_names = arg_names
+
+    def test_case_id(self, arg=()):
+        """Id matching the history of the test, stable across runs.
+
+        Cases of generator tests are told apart by their arguments.
+        """
+        if self.code_ref is None:
+            return None
+        if not arg:
+            return self.code_ref
+        return '{0}[{1}]'.format(self.code_ref, ','.join(safe_str(a) for a in arg))
+
+    def parameters(self, arg=()):
+        """Report Portal parameters of a generated case, named after the
+        arguments of the function the generator yields."""
+        if not arg:
+            return None
+        names = self.arg_names
+        return dict((names[i] if i < len(names) else 'arg{0}'.format(i), safe_str(value))
+                    for i, value in enumerate(arg))
+
+
+def _func_name(func):
+    return getattr(func, 'compat_func_name', None) or func.__name__
+
+
+def _arg_names(func):
+    """Names of the positional arguments of ``func``, ``self`` excluded."""
+    try:
+        if hasattr(inspect, 'signature'):
+            return tuple(p.name for p in inspect.signature(func).parameters.values()
+                         if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD))
+        names = inspect.getargspec(getattr(func, '__func__', func)).args
+        return tuple(names[1:] if inspect.ismethod(func) else names)
+    except (TypeError, ValueError):
+        return ()
+
+
+def attr_attributes(*owners):
+    """Report Portal attributes set by nose's ``attr`` decorator.
+
+    ``@attr('slow')`` becomes the ``slow`` tag and ``@attr(type='unit')``
+    the ``type: unit`` attribute; list values give one attribute per item.
+    Classes also hold ordinary data, so only their scalar attributes, such
+    as strings and numbers, are reported.
+    """
+    attributes = []
+    for owner in owners:
+        owner = getattr(owner, '__func__', owner)
+        scalars_only = inspect.isclass(owner)
+        for key, value in sorted(getattr(owner, '__dict__', {}).items()):
+            if (key.startswith('_') or key in NOT_ATTRIBUTES or callable(value)
+                    or isinstance(value, (classmethod, staticmethod, property))):
+                continue
+            if scalars_only and not isinstance(value, _SCALARS):
+                continue
+            values = value if isinstance(value, (list, tuple)) else [value]
+            for item in values:
+                if item is True:
+                    attributes.append({'value': key})
+                else:
+                    attributes.append({'key': key, 'value': safe_str(item)})
+    return attributes
+
+
+def _inspect_case(case):
+    """Return ``(key, code_ref, arg, owners, target)`` of ``case``.
+
+    ``key`` identifies the test function, all cases yielded by one
+    generator share it. ``owners`` are the function and class which may
+    carry ``attr`` attributes, ``target`` is the callable receiving ``arg``.
+    """
+    if isinstance(case, MethodTestCase):
+        func, arg = case._descriptors()
+        name = _func_name(func)
+        return ((case.cls, name),
+                '{0}:{1}.{2}'.format(case.cls.__module__, case.cls.__name__, name),
+                arg, (case.cls, func), case.test)
+    if isinstance(case, FunctionTestCase):
+        func, arg = case._descriptors()
+        return (func, '{0}:{1}'.format(func.__module__, _func_name(func)),
+                arg, (func,), case.test)
+    if isinstance(case, unittest.TestCase):
+        cls = type(case)
+        name = case._testMethodName
+        return ((cls, name),
+                '{0}:{1}.{2}'.format(cls.__module__, cls.__name__, name),
+                (), (cls, getattr(cls, name, None)), None)
+    return None, None, (), (), None
+
+
+class TestMetadataCache(object):
+    """Memoizes :class:`TestMetadata` per test function or method.
+
+    :param ignored_tags: tags and attribute keys which are not reported
+    """
+
+    def __init__(self, ignored_tags=()):
+        self.ignored_tags = frozenset(ignored_tags)
+        self._cache = {}
+
+    def _attributes(self, test, owners):
+        try:
+            tags = test.test.suites
+        except AttributeError:
+            tags = []
+        if not isinstance(tags, (list, tuple, set)):
+            tags = [tags] if tags else []
+        attributes = [{'value': tag} for tag in tags] + attr_attributes(*owners)
+        return [a for a in attributes
+                if a['value'] not in self.ignored_tags and a.get('key') not in self.ignored_tags]
+
+    def get(self, ev, test):
+        """Return the metadata and the generator arguments of ``test``.
+
+        :param ev: the plugin, used to describe the test
+        :param test: the test case
+        :type test: :class:`nose.case.Test`
+        """
+        key, code_ref, arg, owners, target = _inspect_case(getattr(test, 'test', None))
+        metadata = self._cache.get(key) if key is not None else None
+        if metadata is None:
+            metadata = TestMetadata(ev.describeTest(test), self._attributes(test, owners), code_ref,
+                                    _arg_names(target) if target is not None and arg else ())
+            if key is not None:
+                self._cache[key] = metadata
+        return metadata, arg
@@ -13,23 +13,34 @@
 #  limitations under the License.
 import os
 import sys
+import six
 if sys.version_info.major == 2:
-    import ConfigParser as configparser
     from StringIO import StringIO
 else:
-    import configparser
     from io import StringIO
 
 import threading
+import functools
 import logging
 import traceback
+from collections import deque
 from nose.plugins.base import Plugin
+from logging import Handler
 from nose.plugins.logcapture import MyMemoryHandler
 from nose import SkipTest
 from nose.plugins.skip import Skip
 from nose.plugins.logcapture import LogCapture
 from nose.plugins.deprecated import DeprecatedTest
+from .budget import PayloadBudget
+from .capture import FDCapture
+from .config import Config, parse_overrides
+from .filters import LoggerMatcher
+from .profiling import create_profiler
+from .resources import ResourceCollector, snapshot
+from .sampling import PassSampler
+from .clock import timestamp
 from .service import NoseServiceClass
+from .triage import KnownIssues, failure_signature
 
 from nose.pyversion import exc_to_unicode, force_unicode
 from nose.util import safe_str, isclass
@@ -40,17 +51,141 @@ log.addHandler(logging.NullHandler())
 # Disabled because we've already had a overloaded capturing of the logs
 LogCapture.enabled = False
 
+_thread_context = threading.local()
+
+# launch name postfixes picked by the --attr expression selecting the tests
+DEFAULT_ATTR_LAUNCH_NAMES = [
+    ("(integration tests)", "type=integration"),
+    ("(component tests)", "type=component"),
+]
+
+
+def attributes_from_attrs(attrs):
+    """Turn ``--attr`` expressions into launch attributes.
+
+    ``key=value`` becomes an attribute, a bare ``key`` a tag, negated
+    expressions are left out.
+    """
+    attributes = []
+    for expression in attrs:
+        if expression.startswith("!"):
+            continue
+        key, sep, value = expression.partition("=")
+        attributes.append({'key': key, 'value': value} if sep else {'value': key})
+    return attributes
+
+
+def current_log_context():
+    """Return the log context bound to the calling thread, if any.
+
+    Inside a test this is the context of the running test, which can be
+    used to bind worker threads to it::
+
+        executor.submit(current_log_context().wrap(func))
+    """
+    return getattr(_thread_context, 'log_context', None)
+
+
+class LogContext(object):
+    """Buffer of the log records of a single test.
+
+    A context is created in ``startTest`` and bound to the thread running
+    the test. Records emitted by threads bound to a context always go to
+    it, records of unbound threads go to the context of the running test.
+    """
+
+    def __init__(self):
+        self.records = deque()
+
+    def append(self, record):
+        # deque.append() is atomic, so emitting threads don't need a lock.
+        # Records are sent once the test has an outcome, they keep the
+        # time they were emitted at, read from the clock of the items.
+        self.records.append((timestamp(), record))
+
+    def drain(self, timed=False):
+        """Remove and return the records, as ``(time, record)`` pairs when ``timed``."""
+        records = []
+        try:
+            while True:
+                records.append(self.records.popleft())
+        except IndexError:
+            pass
+        if timed:
+            return records
+        return [record for _, record in records]
+
+    def bind(self):
+        _thread_context.log_context = self
+
+    @staticmethod
+    def unbind():
+        _thread_context.log_context = None
+
+    def wrap(self, func):
+        """Return ``func`` bound to this context in the thread it runs in."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            previous = current_log_context()
+            self.bind()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _thread_context.log_context = previous
+        return wrapper
+
 
 class RPNoseLogHandler(MyMemoryHandler):
-    def __init__(self, extended_filters=None):
+    def __init__(self, extended_filters=None, levels=None):
         logformat = '%(name)s: %(levelname)s: %(message)s'
         logdatefmt = None
         filters = ['-nose', '-reportportal_client.service_async',
-                   '-reportportal_client.service', '-nose_reportportal.plugin',
-                   '-nose_reportportal.service']
+                   '-reportportal_client.service', '-nose_reportportal']
         if extended_filters:
             filters.extend(extended_filters)
+        self.context = LogContext()
         super(RPNoseLogHandler, self).__init__(logformat, logdatefmt, filters)
+        self.matcher = LoggerMatcher(filters, levels)
+
+    def activate(self, context):
+        """Make ``context`` the destination of records of unbound threads."""
+        self.context = context
+
+    def filter(self, record):
+        if self.matcher.allow(record):
+            return Handler.filter(self, record) if self.filters else True
+        return False
+
+    def handle(self, record):
+        # Log contexts are thread-safe, so the handler lock which
+        # logging.Handler.handle() takes around every emit() is not needed.
+        if self.filter(record):
+            self.emit(record)
+            return True
+        return False
+
+    def emit(self, record):
+        context = current_log_context() or self.context
+        context.append(self.format(record))
+
+    def drain(self, context=None, timed=False):
+        """Remove and return the formatted records of ``context``."""
+        return (context or self.context).drain(timed)
+
+    def _get_buffer(self):
+        return [record for _, record in list(self.context.records)]
+
+    def _set_buffer(self, records):
+        self.context = LogContext()
+        for record in records:
+            self.context.append(record)
+
+    buffer = property(_get_buffer, _set_buffer, None, """Records of the active context.""")
+
+    def truncate(self):
+        # Swap the context instead of clearing it, so records emitted
+        # concurrently are never lost in the middle of a clear.
+        self.activate(LogContext())
 
 
 class ReportPortalPlugin(Plugin):
@@ -65,6 +200,19 @@ class ReportPortalPlugin(Plugin):
         self.stdout = []
         self._buf = None
         self.filters = None
+        self.log_levels = None
+        self.sampler = None
+        self.resources = None
+        self.profiler = None
+        self.profile_threshold_ms = None
+        self.rp_launch_id = None
+        self.rp_shutdown_timeout = None
+        self.rp_spill_path = None
+        self.fd_capture = None
+        self.fd_capture_by_result = False
+        self.rp_known_issues = None
+        self.known_issues = None
+        self.log_budget = None
 
     def options(self, parser, env):
         """
@@ -85,7 +233,7 @@ class ReportPortalPlugin(Plugin):
 
         parser.add_option('--rp-mode',
                           action='store',
-                          default="DEFAULT",
+                          default=None,
                           dest='rp_mode',
                           help='level of logging')
 
@@ -95,6 +243,20 @@ class ReportPortalPlugin(Plugin):
                           dest='rp_launch_description',
                           help='description of a launch')
 
+        parser.add_option('--rp-launch-id',
+                          action='store',
+                          default=None,
+                          dest='rp_launch_id',
+                          help='id of a launch started by another process to report to, '
+                               'the launch is not finished by this run')
+
+        parser.add_option('--rp-option',
+                          action='append',
+                          default=[],
+                          dest='rp_options',
+                          metavar='NAME=VALUE',
+                          help='override a setting of the config file, e.g. rp_sample_rate=0.1')
+
         parser.add_option('--ignore-loggers',
                           action='store',
                           default=[],
@@ -116,42 +278,81 @@ class ReportPortalPlugin(Plugin):
 
             self.conf = conf
             self.rp_config = options.rp_config
-            config = configparser.ConfigParser(
-                defaults={
-                    'rp_uuid': '',
-                    'rp_endpoint': '',
-                    'rp_project': '',
-                    'rp_launch': '{}',
-                    'rp_launch_tags': '',
-                    'rp_launch_description': ''
-                }
-            )
-            config.read(self.rp_config)
+            # Workers of the multiprocess plugin get the options of the
+            # parent, including the settings it resolved.
+            if getattr(options, 'rp_resolved_config', None):
+                config = Config.loads(options.rp_resolved_config)
+            else:
+                config = Config.load(self.rp_config, overrides=self._config_overrides(options))
+                options.rp_resolved_config = config.dumps()
+            self.config = config
 
+            selected_attrs = [a.strip() for value in (options.attr or []) for a in value.split(",") if a.strip()]
+            self.rp_launch_attributes = attributes_from_attrs(selected_attrs)
             if options.rp_launch:
                 slaunch = options.rp_launch
             else:
                 slaunch = "(unit tests)"
-                if options.attr:
-                    if "type=integration" in options.attr:
-                        slaunch = "(integration tests)"
-                    elif "type=component" in options.attr:
-                        slaunch = "(component tests)"
-
-            self.rp_mode = options.rp_mode if options.rp_mode in ("DEFAULT", "DEBUG") else "DEFAULT"
-
-            if options.ignore_loggers and isinstance(options.ignore_loggers, basestring):
+                if config.attr_launch_names is not None:
+                    launch_names = config.attr_launch_names
+                else:
+                    launch_names = DEFAULT_ATTR_LAUNCH_NAMES
+                for name, expression in launch_names:
+                    if expression in selected_attrs:
+                        slaunch = name
+                        break
+
+            if options.ignore_loggers and isinstance(options.ignore_loggers, six.string_types):
                 self.filters = [x.strip() for x in options.ignore_loggers.split(",")]
 
             self.clear = True
-            if "base" in config.sections():
-                self.rp_uuid = config.get("base", "rp_uuid")
-                self.rp_endpoint = config.get("base", "rp_endpoint")
+            self.rp_mode = config.rp_mode
+            self.rp_uuid = config.rp_uuid
+            self.rp_endpoint = config.rp_endpoint
+            if config.rp_export_endpoint:
+                # lets tests exclude Report Portal from their url mockers
                 os.environ["RP_ENDPOINT"] = self.rp_endpoint
-                self.rp_project = config.get("base", "rp_project")
-                self.rp_launch = config.get("base", "rp_launch").format(slaunch)
-                self.rp_launch_tags = config.get("base", "rp_launch_tags")
-                self.rp_launch_description = options.rp_launch_description or config.get("base", "rp_launch_description")
+            self.rp_project = config.rp_project
+            self.rp_launch = config.rp_launch.format(slaunch)
+            self.rp_launch_tags = config.rp_launch_tags
+            self.rp_launch_description = config.rp_launch_description
+            self.rp_launch_id = config.rp_launch_id or None
+            self.rp_backend = config.rp_backend
+            self.rp_backend_path = config.rp_backend_path
+            self.rp_async_concurrency = config.rp_async_concurrency
+            self.rp_log_batch_size = config.rp_log_batch_size
+            self.rp_retries = config.rp_retries
+            self.rp_journal_path = config.rp_journal_path
+            self.rp_shutdown_timeout = config.rp_shutdown_timeout or None
+            self.rp_spill_path = config.rp_spill_path
+            self.rp_known_issues = config.rp_known_issues
+            if config.rp_log_budget_launch_kb or config.rp_log_budget_item_kb:
+                self.log_budget = PayloadBudget(config.rp_log_budget_launch_kb * 1024 or None,
+                                                config.rp_log_budget_item_kb * 1024 or None)
+            ignore_loggers = [x.strip() for x in config.rp_ignore_loggers.split(",") if x.strip()]
+            if ignore_loggers:
+                self.filters = ignore_loggers + (self.filters or [])
+            if config.rp_sample_rate < 1.0:
+                self.sampler = PassSampler(config.rp_sample_rate)
+            if config.rp_resource_usage:
+                self.resources = ResourceCollector(config.rp_resource_top)
+            if config.rp_profiler:
+                self.profiler = create_profiler(config.rp_profiler, interval_ms=config.rp_profile_interval_ms)
+                self.profile_threshold_ms = config.rp_profile_threshold_ms
+            if config.rp_capture == "fd":
+                self.fd_capture = FDCapture(config.rp_capture_max_kb * 1024)
+            self.log_levels = config.log_levels
+
+    @staticmethod
+    def _config_overrides(options):
+        overrides = parse_overrides(options.rp_options)
+        if options.rp_mode:
+            overrides["rp_mode"] = options.rp_mode
+        if options.rp_launch_description:
+            overrides["rp_launch_description"] = options.rp_launch_description
+        if options.rp_launch_id:
+            overrides["rp_launch_id"] = options.rp_launch_id
+        return overrides
 
     def setupLoghandler(self):
         # setup our handler with root logger
@@ -188,17 +389,37 @@ class ReportPortalPlugin(Plugin):
         self.service.init_service(endpoint=self.rp_endpoint,
                                   project=self.rp_project,
                                   token=self.rp_uuid,
-                                  ignore_errors=False)
-
-
-        # Start launch.
-        self.launch = self.service.start_launch(name=self.rp_launch,
-                                                description=self.rp_launch_description,
-                                                mode=self.rp_mode)
-
-        self.handler = RPNoseLogHandler(self.filters if self.filters else None)
+                                  ignore_errors=False,
+                                  log_batch_size=self.rp_log_batch_size,
+                                  retries=self.rp_retries,
+                                  backend=self.rp_backend,
+                                  backend_options=self._backend_options(),
+                                  journal_path=self.rp_journal_path or None,
+                                  budget=self.log_budget)
+        if self.rp_known_issues:
+            self.known_issues = KnownIssues(self.rp_known_issues, self.service.issue_types)
+
+        if self.rp_launch_id:
+            # A shard of a distributed run, the launch is managed elsewhere.
+            self.service.attach_launch(self.rp_launch_id)
+        else:
+            # Start launch.
+            self.launch = self.service.start_launch(name=self.rp_launch,
+                                                    description=self.rp_launch_description,
+                                                    mode=self.rp_mode,
+                                                    tags=[t.strip() for t in self.rp_launch_tags.split(";") if t.strip()],
+                                                    attributes=self.rp_launch_attributes)
+
+        self.handler = RPNoseLogHandler(self.filters if self.filters else None, self.log_levels)
         self.setupLoghandler()
 
+    def _backend_options(self):
+        if self.rp_backend == 'file':
+            return {'path': self.rp_backend_path}
+        if self.rp_backend == 'async':
+            return {'concurrency': self.rp_async_concurrency}
+        return {}
+
     def _restore_stdout(self):
         """Restore stdout.
         """
@@ -220,14 +441,46 @@ class ReportPortalPlugin(Plugin):
            **before** the default report output is sent.
         """
 
-        # Finish launch.
-        self.service.finish_launch()
+        if self.resources:
+            # sent before the launch finishes, like any other log of the launch
+            self.service.post_log(self.resources.report())
+        # launch records over the budget, also sent by shards which don't finish the launch
+        self.service.post_overflow(None)
+
+        # Finish launch, unless it is shared with other shards of a distributed run.
+        if not self.rp_launch_id:
+            attributes = {}
+            if self.sampler:
+                attributes.update(self.sampler.attributes())
+            if self.log_budget:
+                attributes.update(self.log_budget.attributes())
+            if attributes:
+                self.service.finish_launch(attributes=attributes)
+            else:
+                self.service.finish_launch()
+        # shards don't finish the launch, so they have no attributes to carry the counters
+        if self.sampler:
+            sys.stderr.write('Report Portal: {0}\n'.format(self.sampler.report()))
+        if self.log_budget:
+            sys.stderr.write('Report Portal: {0}\n'.format(self.log_budget.report()))
 
         # Due to async nature of the service we need to call terminate() method which
         # ensures all pending requests to server are processed.
         # Failure to call terminate() may result in lost data.
-        self.service.terminate_service()
+        left = self.service.terminate_service(timeout=self.rp_shutdown_timeout,
+                                              spill_path=self.rp_spill_path,
+                                              progress=self._shutdown_progress)
+        if left:
+            sys.stderr.write('Report Portal: {0} requests were not sent in {1} s and were saved to {2}, send them with\n'
+                             '  python -m nose_reportportal.journal {2} --rp-config-file {3}\n'
+                             .format(left, self.rp_shutdown_timeout, self.rp_spill_path, self.rp_config))
         self._restore_stdout()
+        if self.fd_capture:
+            self.fd_capture.close()
+
+    @staticmethod
+    def _shutdown_progress(left, rate):
+        sys.stderr.write('Report Portal: {0} requests left, {1:.1f} requests/s\n'.format(left, rate))
 
     def startTest(self, test):
         """Prepare or wrap an individual test case. Called before
@@ -248,8 +501,44 @@ class ReportPortalPlugin(Plugin):
         self.start()
         test.status = None
         test.errors = None
-        test.test_item = self.service.start_nose_item(self, test)
+        test.item_finished = False
+        test.log_context = LogContext()
+        test.log_context.bind()
+        self.handler.activate(test.log_context)
+        if self.sampler:
+            # The outcome decides whether the test is reported,
+            # so the item is started in stopTest.
+            test.test_item = None
+            test.start_time = timestamp()
+        else:
+            test.test_item = self.service.start_nose_item(self, test)
         self.setupLoghandler()
+        if self.resources:
+            test.resource_snapshot = snapshot()
+        if self.profiler:
+            self.profiler.start()
+        if self.fd_capture:
+            test.fd_output = None
+            if not self.fd_capture_by_result:
+                self.fd_capture.start()
+
+    def prepareTestResult(self, result):
+        """Start the output capture from the result's startTest.
+
+        Nose's result runs after the plugins and prints the name of the
+        test with ``-v``, which must not end up in the captured output.
+        """
+        if not self.fd_capture:
+            return
+        start_test = result.startTest
+
+        def startTest(test):
+            start_test(test)
+            if not self.fd_capture.active:
+                self.fd_capture.start()
+
+        result.startTest = startTest
+        self.fd_capture_by_result = True
 
     def addDeprecated(self, test):
         """Called when a deprecated test is seen. DO NOT return a value
@@ -267,6 +556,8 @@ class ReportPortalPlugin(Plugin):
 
         test.errors.append(value)
         test.errors.append(str(etype.__name__) + ":\n" + "".join(traceback.format_tb(tb)))
+        if self.known_issues:
+            test.failure_signature = failure_signature(etype, tb)
 
     def _filterErrorForSkip(self, err):
         if isinstance(err, tuple) and isclass(err[0]):
@@ -292,7 +583,9 @@ class ReportPortalPlugin(Plugin):
         :param err: sys.exc_info() tuple
         :type err: 3-tuple
         """
-
+        if not self._started(test):
+            return
+        self._stop_fd_capture(test)
         if self._filterErrorForSkip(err):
             self.addSkip(test)
         elif self._filterErrorForDepricated(err):
@@ -300,6 +593,7 @@ class ReportPortalPlugin(Plugin):
         else:
             test.status = "error"
             self._addError(test, err)
+        self._outcome_known(test)
 
     def addFailure(self, test, err):
         """Called when a test fails. DO NOT return a value unless you
@@ -310,8 +604,12 @@ class ReportPortalPlugin(Plugin):
         :param err: 3-tuple
         :type err: sys.exc_info() tuple
         """
+        if not self._started(test):
+            return
+        self._stop_fd_capture(test)
         test.status = "failed"
         self._addError(test, err)
+        self._outcome_known(test)
 
     def addSkip(self, test):
         """Called when a test is skipped. DO NOT return a value unless
@@ -328,7 +626,33 @@ class ReportPortalPlugin(Plugin):
         :param test: the test case
         :type test: :class:`nose.case.Test`
         """
+        if not self._started(test):
+            return
+        self._stop_fd_capture(test)
         test.status = "success"
+        self._outcome_known(test)
+
+    @staticmethod
+    def _started(test):
+        # Errors of fixtures, a failing setup_module for instance, are
+        # reported with the context suite, which has no item.
+        return getattr(test, 'item_finished', None) is not None
+
+    def _stop_fd_capture(self, test):
+        # Nose reports the outcome right after the plugins, the output
+        # capture stops here so the progress it prints is not captured.
+        if self.fd_capture and self.fd_capture.active:
+            test.fd_output = self.fd_capture.stop()
+
+    def _outcome_known(self, test):
+        # The item is finished as soon as the outcome is known instead of
+        # in stopTest, so the dashboard follows the run. Unittest reports
+        # failures before tearDown runs, which may fail again.
+        if test.item_finished:
+            if test.test_item is not None:
+                self._post_errors(test)
+        else:
+            self._finish(test)
 
     def beforeTest(self, test):
         """Clear buffers and handlers before test.
@@ -340,10 +664,11 @@ class ReportPortalPlugin(Plugin):
         """
         self.end()
         self._buf = None
+        LogContext.unbind()
         self.handler.truncate()
 
-    def formatLogRecords(self):
-        return list(map(safe_str, self.handler.buffer))
+    def formatLogRecords(self, context=None):
+        return list(map(safe_str, self.handler.drain(context)))
 
     def formatError(self, test, err):
         """Add captured output to error report.
@@ -399,49 +724,119 @@ class ReportPortalPlugin(Plugin):
         :param test: the test case
         :type test: :class:`nose.case.Test`
         """
+        self._stop_fd_capture(test)
+        if not test.item_finished:
+            self._finish(test)
+        elif test.test_item is not None:
+            # records emitted after the outcome, by tearDown for instance
+            records = self.handler.drain(getattr(test, 'log_context', None), timed=True)
+            if records:
+                self._post_logs(test, records)
+                self.service.post_overflow(test.test_item)
+
+    def _finish(self, test):
+        test.item_finished = True
+        profile = self.profiler.stop() if self.profiler else None
+        if self.resources:
+            test.resource_usage = self.resources.measure(str(test), test.resource_snapshot)
+
+        if self.sampler and test.test_item is None:
+            if test.status == "success" and not self.sampler.keep(test.id()):
+                self.sampler.add_sampled_out(timestamp() - test.start_time)
+                return
+            test.test_item = self.service.start_nose_item(self, test, start_time=test.start_time)
+
         test.capturedOutput = self.buffer
-        test.capturedLogging = self.formatLogRecords()
+        records = self.handler.drain(getattr(test, 'log_context', None), timed=True)
+        test.capturedLogging = [safe_str(record) for _, record in records]
+
+        # The status goes first, the logs are back-dated to when they
+        # were emitted and follow it.
+        if sys.version_info.major == 3 and test.status is None:
+            # no outcome was reported to the plugins
+            self._stop_test_3(test)
+        else:
+            self._stop_test_2(test)
 
         if test.capturedOutput:
             try: 
-                self.service.post_log(safe_str(test.capturedOutput))
+                self.service.post_log(safe_str(test.capturedOutput), item_id=test.test_item)
             except Exception:
                 log.exception('Unexpected error during sending capturedOutput.')
 
-        if test.capturedLogging:
-            for x in test.capturedLogging:
-                try: 
-                    self.service.post_log(safe_str(x))
-                except Exception:
-                    log.exception('Unexpected error during sending capturedLogging.')
+        if self.fd_capture and test.fd_output:
+            try:
+                self.service.post_log('Output of the test and its subprocesses',
+                                      attachment={'name': 'output.txt', 'data': test.fd_output,
+                                                  'mime': 'text/plain'},
+                                      item_id=test.test_item)
+            except Exception:
+                log.exception('Unexpected error during sending captured output.')
+
+        self._post_logs(test, records, test.capturedLogging)
+        self._post_errors(test)
+
+        if profile is not None and profile.duration_ms >= self.profile_threshold_ms:
+            try:
+                self.service.post_log('Profile of a test which took {0} ms'.format(profile.duration_ms),
+                                      attachment=profile.attachment(), item_id=test.test_item)
+            except Exception:
+                log.exception('Unexpected error during sending profile.')
 
+        self.service.post_overflow(test.test_item)
+
+    def _post_logs(self, test, records, messages=None):
+        if messages is None:
+            messages = [safe_str(record) for _, record in records]
+        for (log_time, _), message in zip(records, messages):
+            try: 
+                self.service.post_log(message, item_id=test.test_item, log_time=log_time)
+            except Exception:
+                log.exception('Unexpected error during sending capturedLogging.')
+
+    def _post_errors(self, test):
         if test.errors:
             try: 
-                self.service.post_log(safe_str(test.errors[0]))
-                self.service.post_log(safe_str(test.errors[1]), loglevel="ERROR")
+                self.service.post_log(safe_str(test.errors[0]), item_id=test.test_item)
+                self.service.post_log(safe_str(test.errors[1]), loglevel="ERROR", item_id=test.test_item)
             except Exception:
                 log.exception('Unexpected error during sending errors.')
 
-        if sys.version_info.major == 2:
-            self._stop_test_2(test)
-        elif sys.version_info.major == 3:
-            self._stop_test_3(test)
-
     def _stop_test_2(self, test):
         if test.status == "skipped":
-            self.service.finish_nose_item(test.test_item, status="SKIPPED")
+            self.service.finish_nose_item(test.test_item, status="SKIPPED", attributes=self._item_attributes(test))
         elif test.status == "success":
-            self.service.finish_nose_item(test.test_item, status="PASSED")
+            self.service.finish_nose_item(test.test_item, status="PASSED", attributes=self._item_attributes(test))
         else:
-            self.service.finish_nose_item(test.test_item, status="FAILED")
+            self.service.finish_nose_item(test.test_item, status="FAILED", attributes=self._item_attributes(test),
+                                          issue=self._item_issue(test))
+
+    def _item_attributes(self, test):
+        attributes = []
+        if self.resources:
+            attributes.extend(test.resource_usage.attributes())
+        if self.known_issues and getattr(test, 'failure_signature', None):
+            # lets failures be looked up to add them to the known issues
+            attributes.append({'key': 'failure_signature', 'value': test.failure_signature})
+        return attributes or None
+
+    def _item_issue(self, test):
+        if self.known_issues and getattr(test, 'failure_signature', None):
+            return self.known_issues.issue(test.failure_signature)
+        return None
 
     def describeTest(self, test):
         return test.test._testMethodDoc
 
     def _stop_test_3(self, test):
-        if test.test._outcome.skipped:
-            self.service.finish_nose_item(test.test_item, status="SKIPPED")
-        elif test.test._outcome.success:
-            self.service.finish_nose_item(test.test_item, status="PASSED")
+        outcome = getattr(test.test, '_outcome', None)
+        if outcome is None:
+            # Python 3.11 clears the outcome before stopTest
+            self._stop_test_2(test)
+        elif getattr(outcome, 'skipped', False):
+            self.service.finish_nose_item(test.test_item, status="SKIPPED", attributes=self._item_attributes(test))
+        elif outcome.success:
+            self.service.finish_nose_item(test.test_item, status="PASSED", attributes=self._item_attributes(test))
         else:
-            self.service.finish_nose_item(test.test_item, status="FAILED")
+            self.service.finish_nose_item(test.test_item, status="FAILED", attributes=self._item_attributes(test),
+                                          issue=self._item_issue(test))
@@ -0,0 +1,154 @@
+#  Copyright (c) 2019 http://reportportal.io
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Profilers run around every test, the profile is only rendered for slow tests."""
+
+import cProfile
+import gzip
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+import six
+
+from .clock import monotonic
+
+
+def _gzip(text):
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb') as f:
+        f.write(text.encode('utf-8'))
+    return buf.getvalue()
+
+
+class Profile(object):
+    """Result of profiling a single test."""
+
+    def __init__(self, duration_ms, render, name):
+        self.duration_ms = duration_ms
+        self._render = render
+        self.name = name
+
+    def attachment(self):
+        """Gzipped text of the profile, rendered on demand."""
+        return {
+            'name': self.name,
+            'data': _gzip(self._render()),
+            'mime': 'application/gzip',
+        }
+
+
+class CProfileProfiler(object):
+    """Deterministic profiler, the attachment is a ``pstats`` report."""
+
+    def __init__(self, lines=50, **kwargs):
+        self.lines = lines
+        self._profile = None
+        self._start = None
+
+    def start(self):
+        self._start = monotonic()
+        self._profile = cProfile.Profile()
+        try:
+            self._profile.enable()
+        except ValueError:
+            # another profiler is already active
+            self._profile = None
+
+    def stop(self):
+        profile = self._profile
+        if profile is not None:
+            profile.disable()
+        duration_ms = int((monotonic() - self._start) * 1000)
+
+        def render():
+            if profile is None:
+                return u'Profiling was not possible, another profiler was active.'
+            stream = six.StringIO()
+            pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(self.lines)
+            return six.text_type(stream.getvalue())
+        return Profile(duration_ms, render, 'profile.txt.gz')
+
+
+def _fold(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append('{0} ({1}:{2})'.format(code.co_name, os.path.basename(code.co_filename),
+                                            code.co_firstlineno))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler(object):
+    """Samples the stack of the test thread every ``interval_ms``.
+
+    Sampling runs in a daemon thread which sleeps while no test runs, the
+    attachment lists the folded stacks used to draw flame graphs.
+    """
+
+    def __init__(self, interval_ms=5, **kwargs):
+        self.interval = interval_ms / 1000.0
+        self._active = threading.Event()
+        self._stacks = Counter()
+        self._thread_id = None
+        self._thread = None
+        self._start = None
+
+    def _run(self):
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            stacks = self._stacks
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None and self._active.is_set():
+                stacks[_fold(frame)] += 1
+            del frame
+
+    def start(self):
+        self._stacks = Counter()
+        self._thread_id = threading.current_thread().ident
+        self._start = monotonic()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='rp-sampling-profiler')
+            self._thread.daemon = True
+            self._thread.start()
+        self._active.set()
+
+    def stop(self):
+        self._active.clear()
+        stacks = self._stacks
+        duration_ms = int((monotonic() - self._start) * 1000)
+
+        def render():
+            return u'\n'.join(u'{0} {1}'.format(stack, count) for stack, count in stacks.most_common())
+        return Profile(duration_ms, render, 'profile.folded.gz')
+
+
+PROFILERS = {
+    'cprofile': CProfileProfiler,
+    'sampling': SamplingProfiler,
+}
+
+
+def create_profiler(name, **kwargs):
+    try:
+        return PROFILERS[name](**kwargs)
+    except KeyError:
+        raise ValueError('Unknown profiler {0!r}. Available profilers: {1}.'
+                         .format(name, ', '.join(sorted(PROFILERS))))
@@ -0,0 +1,138 @@
+#  Copyright (c) 2019 http://reportportal.io
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import gc
+import heapq
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from .clock import monotonic
+
+if hasattr(time, 'process_time'):
+    process_time = time.process_time
+else:
+    process_time = time.clock
+
+try:
+    _PAGE_KB = os.sysconf('SC_PAGE_SIZE') // 1024
+except (AttributeError, ValueError, OSError):
+    _PAGE_KB = 4
+
+
+def rss_kb():
+    """Resident set size of the process in kilobytes.
+
+    Read from ``/proc`` or with ``psutil``. Where neither is available,
+    falls back to the peak RSS, which never goes down.
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_KB
+    except (IOError, OSError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss // 1024
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # in bytes on macOS
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def gc_collections():
+    if not hasattr(gc, 'get_stats'):
+        return 0
+    return sum(stats['collections'] for stats in gc.get_stats())
+
+
+def snapshot():
+    return monotonic(), process_time(), rss_kb(), gc_collections()
+
+
+class ResourceUsage(object):
+    """Resources used by a single test."""
+
+    __slots__ = ('name', 'wall_ms', 'cpu_ms', 'rss_delta_kb', 'gc_collections')
+
+    def __init__(self, name, wall_ms, cpu_ms, rss_delta_kb, gc_collections):
+        self.name = name
+        self.wall_ms = wall_ms
+        self.cpu_ms = cpu_ms
+        self.rss_delta_kb = rss_delta_kb
+        self.gc_collections = gc_collections
+
+    def attributes(self):
+        return [
+            {'key': 'wall_ms', 'value': str(self.wall_ms)},
+            {'key': 'cpu_ms', 'value': str(self.cpu_ms)},
+            {'key': 'rss_delta_kb', 'value': str(self.rss_delta_kb)},
+            {'key': 'gc_collections', 'value': str(self.gc_collections)},
+        ]
+
+
+class ResourceCollector(object):
+    """Measures the tests and keeps the ``top`` slowest and most memory-hungry ones."""
+
+    def __init__(self, top=10):
+        self.top = top
+        self._slowest = []
+        self._hungriest = []
+        self._counter = 0
+
+    def _keep(self, heap, key, usage):
+        # the counter breaks ties, usages are not comparable
+        self._counter += 1
+        entry = (key, self._counter, usage)
+        if len(heap) < self.top:
+            heapq.heappush(heap, entry)
+        elif key > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+
+    def measure(self, name, start):
+        """Return the usage of the test ``name`` since the ``start`` snapshot."""
+        wall, cpu, rss, collections = snapshot()
+        usage = ResourceUsage(name,
+                              int((wall - start[0]) * 1000),
+                              int((cpu - start[1]) * 1000),
+                              rss - start[2],
+                              collections - start[3])
+        if self.top:
+            self._keep(self._slowest, usage.wall_ms, usage)
+            self._keep(self._hungriest, usage.rss_delta_kb, usage)
+        return usage
+
+    def slowest(self):
+        return [usage for _, _, usage in sorted(self._slowest, reverse=True)]
+
+    def hungriest(self):
+        return [usage for _, _, usage in sorted(self._hungriest, reverse=True)]
+
+    def report(self):
+        lines = ['Slowest tests (wall ms, cpu ms):']
+        lines.extend('  {0.wall_ms:>8} {0.cpu_ms:>8}  {0.name}'.format(u) for u in self.slowest())
+        lines.append('Largest RSS growth (kB):')
+        lines.extend('  {0.rss_delta_kb:>8}  {0.name}'.format(u) for u in self.hungriest())
+        return '\n'.join(lines)
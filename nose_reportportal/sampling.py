@@ -0,0 +1,52 @@
+#  Copyright (c) 2019 http://reportportal.io
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import zlib
+
+
+class PassSampler(object):
+    """Deterministic sample of passed tests.
+
+    A test is kept when the CRC32 of its id falls into the first ``rate``
+    part of the hash space, so the same tests are reported on every run.
+    Tests which are sampled out are only counted.
+    """
+
+    def __init__(self, rate):
+        rate = float(rate)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError('Sample rate must be between 0 and 1, got {0}'.format(rate))
+        self.rate = rate
+        self._threshold = int(rate * 0x100000000)
+        self.sampled_out = 0
+        self.sampled_out_duration = 0
+
+    def keep(self, test_id):
+        return (zlib.crc32(test_id.encode('utf-8')) & 0xffffffff) < self._threshold
+
+    def add_sampled_out(self, duration):
+        self.sampled_out += 1
+        self.sampled_out_duration += duration
+
+    def attributes(self):
+        """Aggregated counters, reported as attributes of the launch."""
+        return {
+            'sample_rate': self.rate,
+            'sampled_out_passed': self.sampled_out,
+            'sampled_out_duration_ms': self.sampled_out_duration,
+        }
+
+    def report(self):
+        return ('Sampling: {0.sampled_out} passed tests ({0.sampled_out_duration} ms) not reported '
+                'at sample rate {0.rate}'.format(self))
@@ -12,13 +12,17 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import six
 from six import with_metaclass
-from reportportal_client import ReportPortalService
 import sys
 import traceback
 import pkg_resources
 import logging
-from time import time, sleep
+
+from .backends import attach_launch, create_backend, terminate
+from .clock import timestamp
+from .journal import JournalBackend
+from .metadata import TestMetadataCache
 
 LAUNCH_WAIT_TIMEOUT = 30
 
@@ -26,10 +30,6 @@ log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
 
 
-def timestamp():
-    return str(int(time() * 1000))
-
-
 class Singleton(type):
     _instances = {}
 
@@ -53,24 +53,36 @@ class NoseServiceClass(with_metaclass(Singleton, object)):
         self.ignored_tags = []
 
         self._loglevels = ('TRACE', 'DEBUG', 'INFO', 'WARN', 'ERROR')
+        self.metadata = TestMetadataCache()
+        self.budget = None
 
     def init_service(self, endpoint, project, token, ignore_errors=True,
-                     ignored_tags=[], log_batch_size=20, queue_get_timeout=5, retries=0):
+                     ignored_tags=[], log_batch_size=20, queue_get_timeout=5, retries=0,
+                     backend='reportportal', backend_options=None, journal_path=None, budget=None):
         if self.rp is None:
             self.ignore_errors = ignore_errors
+            self.budget = budget
             if self.rp_supports_parameters:
                 self.ignored_tags = list(set(ignored_tags).union({'parametrize'}))
             else:
                 self.ignored_tags = ignored_tags
+            self.metadata = TestMetadataCache(self.ignored_tags)
             log.debug('ReportPortal - Init service: endpoint=%s, project=%s, uuid=%s', endpoint, project, token)
-            self.rp = ReportPortalService(
+            self.rp = create_backend(
+                backend,
                 endpoint=endpoint,
                 project=project,
                 token=token,
                 retries=retries,
                 log_batch_size=log_batch_size,
                 # verify_ssl=verify_ssl
+                **(backend_options or {})
             )
+            if journal_path:
+                self.rp = JournalBackend(self.rp, journal_path)
+                replayed = self.rp.recover()
+                if replayed:
+                    log.info('ReportPortal - Recovered %s calls of an interrupted run from %s', replayed, journal_path)
 
             if self.rp and hasattr(self.rp, "get_project_settings"):
                 self.project_settings = self.rp.get_project_settings()
@@ -85,40 +97,47 @@ class NoseServiceClass(with_metaclass(Singleton, object)):
     def start_launch(self, name,
                      mode=None,
                      tags=None,
-                     description=None):
+                     description=None,
+                     attributes=None):
         if self.rp is None:
             return
 
+        if tags:
+            attributes = [{'value': tag} for tag in tags] + (attributes or [])
         sl_pt = {
             'name': name,
             'start_time': timestamp(),
             'description': description,
             'mode': mode,
-            'tags': tags,
+            'attributes': attributes,
         }
         self.rp.start_launch(**sl_pt)
 
-    def start_nose_item(self, ev, test=None):
+    def attach_launch(self, launch_id):
+        """Report to the launch ``launch_id`` instead of starting a new one."""
         if self.rp is None:
             return
-        tags = []
-        try:
-            tags = test.test.suites
-        except AttributeError:
-            pass
+        attach_launch(self.rp, launch_id)
+
+    def start_nose_item(self, ev, test=None, start_time=None):
+        if self.rp is None:
+            return
+        metadata, arg = self.metadata.get(ev, test)
         name = str(test)
         start_rq = {
             "name": name,
-            "description": ev.describeTest(test),
-            "tags": tags,
-            "start_time": timestamp(),
+            "description": metadata.description,
+            "attributes": metadata.attributes,
+            "start_time": start_time or timestamp(),
             "item_type": "TEST",
-            "parameters": None,
+            "parameters": metadata.parameters(arg) if self.rp_supports_parameters else None,
+            "code_ref": metadata.code_ref,
+            "test_case_id": metadata.test_case_id(arg),
         }
         self.post_log(name)
         return self.rp.start_test_item(**start_rq)
 
-    def finish_nose_item(self, test_item, status, issue=None):
+    def finish_nose_item(self, test_item, status, issue=None, attributes=None):
         if self.rp is None:
             return
 
@@ -128,27 +147,38 @@ class NoseServiceClass(with_metaclass(Singleton, object)):
             'end_time': timestamp(),
             'status': status,
             'issue': issue,
+            'attributes': attributes,
         }
 
         self.rp.finish_test_item(**fta_rq)
 
-    def finish_launch(self, status=None):
+    def finish_launch(self, status=None, attributes=None):
         if self.rp is None:
             return
 
+        self.post_overflow(None)
         # To finish launch session str parameter is needed
         fl_rq = {
             'end_time': timestamp(),
             'status': status,
+            'attributes': attributes,
         }
         self.rp.finish_launch(**fl_rq)
 
-    def terminate_service(self, nowait=False):
+    def terminate_service(self, nowait=False, timeout=None, spill_path=None, progress=None):
+        """Flush the backend and release it.
+
+        Backends with requests in flight (the ``async`` one) stop waiting
+        for them after ``timeout`` seconds and save the calls left to
+        ``spill_path``, see :meth:`nose_reportportal.aio.AsyncBackend.terminate`.
+        """
+        left = None
         if self.rp is not None:
-            self.rp.terminate(nowait)
+            left = terminate(self.rp, nowait, timeout=timeout, spill_path=spill_path, progress=progress)
             self.rp = None
+        return left
 
-    def post_log(self, message, loglevel='INFO', attachment=None):
+    def post_log(self, message, loglevel='INFO', attachment=None, item_id=None, log_time=None):
         if self.rp is None:
             return
 
@@ -157,14 +187,41 @@ class NoseServiceClass(with_metaclass(Singleton, object)):
                         'Available levels: %s.', loglevel, self._loglevels)
             loglevel = 'INFO'
 
+        time = log_time or timestamp()
+        if self.budget is not None:
+            if attachment is not None:
+                data = attachment.get('data') if isinstance(attachment, dict) else attachment
+                self.budget.add_attachment(len(data) if isinstance(data, six.binary_type) else 0)
+            else:
+                encoded = six.text_type(message).encode('utf-8')
+                if not self.budget.allow(item_id, len(encoded)):
+                    self.budget.overflow(item_id, u'{0} {1} '.format(time, loglevel).encode('utf-8')
+                                         + encoded + b'\n')
+                    return
+
         sl_rq = {
-            'time': timestamp(),
+            'time': time,
             'message': message,
             'level': loglevel,
             'attachment': attachment,
+            'item_id': item_id,
         }
         self.rp.log(**sl_rq)
 
+    def post_overflow(self, item_id):
+        """Send the log records of ``item_id`` over the payload budget."""
+        if self.rp is None:
+            return
+        overflow = self.budget.pop_overflow(item_id) if self.budget is not None else None
+        if overflow is None:
+            return
+        records, data = overflow
+        self.rp.log(time=timestamp(),
+                    message='{0} log records over the payload budget'.format(records),
+                    level='INFO',
+                    attachment={'name': 'logs.txt.gz', 'data': data, 'mime': 'application/gzip'},
+                    item_id=item_id)
+
     def get_issue_types(self):
         issue_types = {}
 
@@ -0,0 +1,83 @@
+#  Copyright (c) 2019 http://reportportal.io
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Launch shared by test runs split across several machines.
+
+A coordinator step of the CI pipeline starts the launch and publishes its
+id, every shard runs nose with ``--rp-launch-id`` (or ``RP_LAUNCH_ID``) and
+reports its items to that launch, and a final step finishes it::
+
+    RP_LAUNCH_ID=$(python -m nose_reportportal.shard start --rp-config-file rp.ini)
+    nosetests --with-reportportal --rp-config-file rp.ini   # on every shard
+    python -m nose_reportportal.shard finish $RP_LAUNCH_ID --rp-config-file rp.ini
+"""
+
+import argparse
+
+from .backends import attach_launch, backend_from_config
+from .clock import timestamp
+from .config import Config
+
+
+def _backend(config):
+    # the async backend only knows the server id of the launch once the
+    # request completes, a single request doesn't need it anyway
+    return backend_from_config(config, 'reportportal' if config.rp_backend == 'async' else None)
+
+
+def start_launch(backend, config, launch=None):
+    """Start the shared launch of ``config`` and return its id."""
+    tags = [t.strip() for t in config.rp_launch_tags.split(';') if t.strip()]
+    return backend.start_launch(name=config.rp_launch.format(launch or '(unit tests)'),
+                                start_time=timestamp(),
+                                description=config.rp_launch_description,
+                                attributes=[{'value': tag} for tag in tags],
+                                mode=config.rp_mode)
+
+
+def finish_launch(backend, launch_id, status=None):
+    attach_launch(backend, launch_id)
+    backend.finish_launch(end_time=timestamp(), status=status)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m nose_reportportal.shard',
+        description='Start or finish a launch shared by several test runs.')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--rp-config-file', required=True, dest='rp_config', help='config file path')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    start = commands.add_parser('start', parents=[common], help='start the launch and print its id')
+    start.add_argument('--rp-launch', dest='rp_launch', help='postfix of launch name in report portal')
+    start.add_argument('--rp-mode', dest='rp_mode', choices=('DEFAULT', 'DEBUG'))
+    finish = commands.add_parser('finish', parents=[common], help='finish the launch')
+    finish.add_argument('launch_id', help='id printed by the start command')
+    finish.add_argument('--status', help='status of the launch, computed by Report Portal by default')
+    args = parser.parse_args(argv)
+
+    overrides = {'rp_mode': args.rp_mode} if getattr(args, 'rp_mode', None) else None
+    config = Config.load(args.rp_config, overrides=overrides)
+    backend = _backend(config)
+    if args.command == 'start':
+        launch_id = start_launch(backend, config, args.rp_launch)
+        backend.terminate()
+        print(launch_id)
+    else:
+        finish_launch(backend, args.launch_id, args.status)
+        backend.terminate()
+
+
+if __name__ == '__main__':
+    main()
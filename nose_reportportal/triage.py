@@ -0,0 +1,121 @@
+#  Copyright (c) 2019 http://reportportal.io
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Automatic triage of failures already known to be caused by an issue.
+
+Each failure gets a signature, a hash of the exception type and of the
+functions of the last frames of its traceback. Line numbers and the
+exception message are left out, so the signature survives unrelated edits
+and varying data. The known issues index is a JSON object mapping
+signatures to issue types::
+
+    {
+        "3f2a9c0d1e4b5a67": "PB",
+        "9c1d2e3f4a5b6c7d": {"issue_type": "SI001", "comment": "Database is flaky"}
+    }
+
+Issue types are short names of the project settings (``PB001``), locators
+(``pb001``) or the default type of a group (``PB``, ``AB``, ``SI``, ``ND``,
+``TI``).
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import traceback
+import unittest
+
+import nose
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+# locators of the default issue type of each group
+DEFAULT_LOCATORS = {
+    'PB': 'pb001',
+    'AB': 'ab001',
+    'SI': 'si001',
+    'ND': 'nd001',
+    'TI': 'ti001',
+}
+
+_FRAMEWORK_DIRS = tuple(os.path.dirname(module.__file__) + os.sep for module in (unittest, nose))
+
+
+def failure_signature(etype, tb, frames=3):
+    """Return the signature of the failure ``etype`` raised with the traceback ``tb``.
+
+    :param frames: number of innermost frames, outside of the test
+                   frameworks, the signature is made of
+    """
+    key = [u'{0}.{1}'.format(etype.__module__, etype.__name__)]
+    functions = [u'{0}:{1}'.format(os.path.splitext(os.path.basename(entry[0]))[0], entry[2])
+                 for entry in traceback.extract_tb(tb)
+                 if not entry[0].startswith(_FRAMEWORK_DIRS)]
+    key.extend(functions[-frames:])
+    return hashlib.sha1(u'|'.join(key).encode('utf-8')).hexdigest()[:16]
+
+
+class KnownIssues(object):
+    """Index of the known issues stored in the JSON file ``path``.
+
+    The file is reloaded whenever it changes, so it can be updated while
+    the tests run.
+
+    :param issue_types: short name -> locator of the project's issue types
+    """
+
+    def __init__(self, path, issue_types=None):
+        self.path = path
+        self.issue_types = issue_types or {}
+        self._issues = {}
+        self._mtime = None
+
+    def _locator(self, issue_type):
+        if issue_type in self.issue_types:
+            return self.issue_types[issue_type]
+        return DEFAULT_LOCATORS.get(issue_type.upper(), issue_type.lower())
+
+    def refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            self._issues, self._mtime = {}, None
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with io.open(self.path, encoding='utf-8') as f:
+                index = json.load(f)
+        except ValueError:
+            log.exception('Invalid known issues index %s', self.path)
+            return
+        issues = {}
+        for signature, issue in index.items():
+            if not isinstance(issue, dict):
+                issue = {'issue_type': issue}
+            issues[signature] = {
+                'issueType': self._locator(issue['issue_type']),
+                'comment': issue.get('comment'),
+                'autoAnalyzed': False,
+                'ignoreAnalyzer': False,
+            }
+        self._issues, self._mtime = issues, mtime
+
+    def issue(self, signature):
+        """Return the issue of the failure with ``signature``, None if it's unknown."""
+        self.refresh()
+        return self._issues.get(signature)
@@ -30,6 +30,10 @@ setup(
     download_url=tar_url,
     packages=['nose_reportportal'],
     install_requires=requirements,
+    extras_require={
+        'async': ['aiohttp>=3.5'],
+        'resources': ['psutil'],
+    },
     license='Apache 2.0',
     keywords=['testing', 'reporting', 'reportportal', 'nose'],
     classifiers=[
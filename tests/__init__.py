@@ -0,0 +1,8 @@
+import collections
+
+try:
+    collections.Callable
+except AttributeError:
+    # nose 1.3.7, which some tests run, predates Python 3.10
+    import collections.abc
+    collections.Callable = collections.abc.Callable
@@ -0,0 +1,4 @@
+import sys
+
+# the asyncio transport, its tests and the stress tests use Python 3.5+ syntax
+collect_ignore = ['test_aio.py', 'test_stress.py'] if sys.version_info < (3, 5) else []
@@ -0,0 +1,69 @@
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import textwrap
+import unittest
+
+if sys.version_info >= (3, 3):
+    from unittest.mock import patch
+else:
+    from mock import patch
+
+import nose
+
+from nose_reportportal.backends import MemoryBackend
+from nose_reportportal.plugin import ReportPortalPlugin
+
+
+class NoseRunTestCase(unittest.TestCase):
+    """Runs nose with the plugin on a test module written to a temporary directory.
+
+    The ``test`` backend is an instance of ``backend_class``, the backends
+    created during the run are kept in ``backends``.
+    """
+
+    backend_class = MemoryBackend
+    module_name = 'module_under_test'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.directory, 'rp.ini')
+        root = logging.getLogger()
+        self.root_handlers = root.handlers[:]
+        self.root_level = root.level
+        self.backends = []
+
+    def tearDown(self):
+        # the plugin leaves its handler on the root logger
+        root = logging.getLogger()
+        root.handlers[:] = self.root_handlers
+        root.setLevel(self.root_level)
+        sys.modules.pop(self.module_name, None)
+        shutil.rmtree(self.directory)
+
+    def run_nose(self, source, settings='rp_backend = test', args=(), test=None):
+        """Run nose on the module ``source``.
+
+        :param settings: lines of the ``base`` section of the config file
+        :param args: extra command line arguments
+        :param test: name of the single test of the module to run
+        :return: True when all tests passed
+        """
+        path = os.path.join(self.directory, self.module_name + '.py')
+        with open(path, 'w') as f:
+            f.write(source)
+        with open(self.config_path, 'w') as f:
+            f.write('[base]\n' + textwrap.dedent(settings).strip() + '\n')
+        backends = self.backends
+
+        class Backend(self.backend_class):
+            def __init__(self, **kwargs):
+                super(Backend, self).__init__(**kwargs)
+                backends.append(self)
+
+        argv = (['nosetests', '--with-reportportal', '--rp-config-file', self.config_path] + list(args) +
+                [path if test is None else '{0}:{1}'.format(path, test)])
+        with patch.dict('nose_reportportal.backends.BACKENDS', {'test': Backend}):
+            return nose.run(argv=argv, addplugins=[ReportPortalPlugin()])
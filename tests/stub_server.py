@@ -0,0 +1,100 @@
+import asyncio
+import json
+import threading
+import uuid
+from collections import Counter
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+ISSUE_GROUPS = ('AUTOMATION_BUG', 'PRODUCT_BUG', 'SYSTEM_ISSUE', 'NO_DEFECT', 'TO_INVESTIGATE')
+ATTRIBUTE_LENGTH_LIMIT = 128
+
+
+def _payload_errors(data):
+    """Return what the server would reject in the attributes and parameters of ``data``."""
+    errors = []
+    for field in ('attributes', 'parameters'):
+        values = data.get(field)
+        if values is None:
+            continue
+        if not isinstance(values, list) or not all(isinstance(value, dict) for value in values):
+            errors.append('{0} is not a list of objects: {1!r}'.format(field, values))
+        elif field == 'attributes' and any(len(str(value.get('value', ''))) > ATTRIBUTE_LENGTH_LIMIT
+                                           for value in values):
+            errors.append('attribute value longer than {0}'.format(ATTRIBUTE_LENGTH_LIMIT))
+    return errors
+
+
+class StubServer(object):
+    """Report Portal API stub answering after ``delay`` seconds.
+
+    :param fail_every: every n-th log request is answered with an error,
+                       0 to answer all of them
+    """
+
+    def __init__(self, delay=0.01, fail_every=0):
+        self.delay = delay
+        self.fail_every = fail_every
+        self.requests = []
+        self.logs = 0
+        # item id -> log records of the accepted requests
+        self.item_logs = Counter()
+        self.failed_logs = 0
+        # (method, path, error) of the requests with a payload the server rejects
+        self.bad_requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever)
+        self._thread.daemon = True
+
+    async def _handle(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if request.path.endswith('/log'):
+                form = await request.post()
+                # only the handler coroutines, all on the loop thread, count
+                if self.fail_every and (self.logs + self.failed_logs + 1) % self.fail_every == 0:
+                    self.failed_logs += 1
+                    return web.json_response({'errorCode': 5000, 'message': 'injected'}, status=500)
+                self.logs += 1
+                for entry in json.loads(form['json_request_part']):
+                    self.item_logs[entry.get('itemUuid')] += 1
+            elif request.method in ('POST', 'PUT'):
+                errors = _payload_errors(await request.json())
+                if errors:
+                    self.bad_requests.extend((request.method, request.path, error) for error in errors)
+                    return web.json_response({'errorCode': 4001, 'message': '; '.join(errors)}, status=400)
+            self.requests.append((request.method, request.path))
+            if request.path.endswith('/settings'):
+                return web.json_response({'subTypes': dict((issue_group, []) for issue_group in ISSUE_GROUPS)})
+            if request.method == 'POST' and not request.path.endswith('/log'):
+                return web.json_response({'id': str(uuid.uuid4())})
+            return web.json_response({'message': 'ok'})
+        finally:
+            self.in_flight -= 1
+
+    async def _start(self):
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_route('*', '/{tail:.*}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        return self._runner.addresses[0][1]
+
+    def start(self):
+        self._thread.start()
+        port = asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return 'http://127.0.0.1:{0}'.format(port)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -0,0 +1,147 @@
+import os
+import shutil
+import tempfile
+import unittest
+from delayed_assert import expect, assert_expectations
+
+from .stub_server import StubServer, web
+
+if web is not None:
+    from nose_reportportal.aio import AsyncBackend
+from nose_reportportal.backends import MemoryBackend
+from nose_reportportal.journal import replay
+
+
+@unittest.skipIf(web is None, 'aiohttp is not installed')
+class AsyncBackendTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer()
+        endpoint = self.server.start()
+        self.backend = AsyncBackend(endpoint=endpoint, project='test_project', token='test_token', concurrency=4)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _report(self, items):
+        self.backend.start_launch(name='launch', start_time='1')
+        for _ in range(items):
+            item_id = self.backend.start_test_item(name='test', start_time='2', item_type='TEST')
+            self.backend.log(time='3', message='message', level='INFO', item_id=item_id)
+            self.backend.finish_test_item(item_id=item_id, end_time='4', status='PASSED')
+        self.backend.finish_launch(end_time='5')
+        self.backend.terminate()
+
+    def test_requests_order(self):
+        self._report(items=20)
+
+        methods = [method for method, _ in self.server.requests]
+        expect(lambda: self.assertEqual(('POST', '/api/v2/test_project/launch'), self.server.requests[0]))
+        expect(lambda: self.assertEqual('PUT', methods[-1]))
+        expect(lambda: self.assertTrue(self.server.requests[-1][1].endswith('/finish')))
+        expect(lambda: self.assertEqual(1 + 20 * 3 + 1, len(self.server.requests)))
+        assert_expectations()
+
+    def test_concurrency_limit(self):
+        self._report(items=20)
+
+        expect(lambda: self.assertLessEqual(self.server.max_in_flight, 4))
+        expect(lambda: self.assertGreater(self.server.max_in_flight, 1))
+        assert_expectations()
+
+    def test_attach_launch(self):
+        self.backend.attach_launch('shared-launch')
+        item_id = self.backend.start_test_item(name='test', start_time='2', item_type='TEST')
+        self.backend.finish_test_item(item_id=item_id, end_time='4', status='PASSED')
+        self.backend.terminate()
+
+        methods = [method for method, _ in self.server.requests]
+        self.assertEqual(['POST', 'PUT'], methods)
+
+    def test_dict_payloads(self):
+        self.backend.start_launch(name='launch', start_time='1', attributes={'branch': 'x' * 200})
+        item_id = self.backend.start_test_item(name='test', start_time='2', item_type='TEST',
+                                               attributes=[{'value': 'slow'}], parameters={'x': 1})
+        self.backend.finish_test_item(item_id=item_id, end_time='4', status='PASSED', attributes={'retried': 0})
+        self.backend.finish_launch(end_time='5', attributes={'sample_rate': 0.5})
+        self.backend.terminate()
+
+        expect(lambda: self.assertEqual([], self.server.bad_requests))
+        expect(lambda: self.assertEqual(4, len(self.server.requests)))
+        assert_expectations()
+
+    def test_failed_logs_are_retried(self):
+        self.server.fail_every = 5
+        self.backend.retries = 2
+        self._report(items=20)
+
+        expect(lambda: self.assertGreater(self.server.failed_logs, 0))
+        expect(lambda: self.assertEqual(20, self.server.logs))
+        expect(lambda: self.assertEqual(20, sum(self.server.item_logs.values())))
+        assert_expectations()
+
+    def test_failed_logs_are_lost_without_retries(self):
+        self.server.fail_every = 5
+        self._report(items=20)
+
+        expect(lambda: self.assertEqual(4, self.server.failed_logs))
+        expect(lambda: self.assertEqual(16, sum(self.server.item_logs.values())))
+        assert_expectations()
+
+
+@unittest.skipIf(web is None, 'aiohttp is not installed')
+class AsyncBackendShutdownTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.spill_path = os.path.join(self.directory, 'spill.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        self.server.stop()
+
+    def _backend(self, delay, concurrency):
+        self.server = StubServer(delay=delay)
+        endpoint = self.server.start()
+        return AsyncBackend(endpoint=endpoint, project='test_project', token='test_token', concurrency=concurrency)
+
+    def test_item_finish_goes_before_logs(self):
+        backend = self._backend(delay=0.01, concurrency=1)
+        backend.start_launch(name='launch', start_time='1')
+        item_id = backend.start_test_item(name='test', start_time='2', item_type='TEST')
+        for _ in range(10):
+            backend.log(time='3', message='message', level='INFO', item_id=item_id)
+        backend.finish_test_item(item_id=item_id, end_time='4', status='PASSED')
+        backend.finish_launch(end_time='5')
+        backend.terminate()
+
+        methods = [method for method, _ in self.server.requests]
+        expect(lambda: self.assertLessEqual(methods.index('PUT'), 3))
+        expect(lambda: self.assertTrue(self.server.requests[-1][1].endswith('/finish')))
+        assert_expectations()
+
+    def test_spill_after_deadline(self):
+        backend = self._backend(delay=0.2, concurrency=1)
+        backend.start_launch(name='launch', start_time='1')
+        item_id = backend.start_test_item(name='test', start_time='2', item_type='TEST')
+        for _ in range(20):
+            backend.log(time='3', message='message', level='INFO', item_id=item_id)
+        backend.finish_test_item(item_id=item_id, end_time='4', status='PASSED')
+        backend.finish_launch(end_time='5')
+        progress = []
+
+        left = backend.terminate(timeout=0.5, spill_path=self.spill_path,
+                                 progress=lambda *args: progress.append(args))
+
+        target = MemoryBackend()
+        replay(self.spill_path, target)
+        events = [event['event'] for event in target.events]
+        expect(lambda: self.assertGreater(left, 0))
+        expect(lambda: self.assertTrue(progress))
+        expect(lambda: self.assertEqual(left, len(events)))
+        expect(lambda: self.assertEqual('finish_launch', events[-1]))
+        assert_expectations()
+
+
+if __name__ == '__main__':
+    unittest.main()
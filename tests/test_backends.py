@@ -0,0 +1,116 @@
+import base64
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from delayed_assert import expect, assert_expectations
+
+from nose_reportportal.backends import MemoryBackend, FileBackend, create_backend, terminate
+
+
+class MemoryBackendTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = MemoryBackend()
+
+    def test_start_test_item(self):
+        self.backend.start_launch(name='launch', start_time='1')
+
+        item_id = self.backend.start_test_item(name='test', start_time='2', item_type='TEST')
+
+        event = self.backend.events[-1]
+        expect(lambda: self.assertEqual('start_test_item', event['event']))
+        expect(lambda: self.assertEqual(item_id, event['item_id']))
+        expect(lambda: self.assertEqual('test', event['name']))
+        assert_expectations()
+
+    def test_events_order(self):
+        self.backend.start_launch(name='launch', start_time='1')
+        item_id = self.backend.start_test_item(name='test', start_time='2', item_type='TEST')
+        self.backend.log(time='3', message='message', level='INFO', item_id=item_id)
+        self.backend.finish_test_item(item_id=item_id, end_time='4', status='PASSED')
+        self.backend.finish_launch(end_time='5')
+
+        self.assertEqual(['start_launch', 'start_test_item', 'log', 'finish_test_item', 'finish_launch'],
+                         [event['event'] for event in self.backend.events])
+
+
+class FileBackendTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'launch.jsonl')
+        self.backend = FileBackend(path=self.path)
+
+    def tearDown(self):
+        self.backend.terminate()
+        shutil.rmtree(self.directory)
+
+    def _read_events(self):
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_log_with_attachment(self):
+        self.backend.log(time='1', message='message',
+                         attachment={'name': 'file.txt', 'data': b'content', 'mime': 'text/plain'})
+        self.backend.terminate()
+
+        attachment = self._read_events()[0]['attachment']
+
+        expect(lambda: self.assertEqual('file.txt', attachment['name']))
+        expect(lambda: self.assertEqual(b'content', base64.b64decode(attachment['data'])))
+        assert_expectations()
+
+    def test_terminate_flushes_events(self):
+        self.backend.start_launch(name='launch', start_time='1')
+        self.backend.finish_launch(end_time='2')
+
+        self.backend.terminate()
+
+        self.assertEqual(['start_launch', 'finish_launch'], [event['event'] for event in self._read_events()])
+
+
+class CreateBackendTestCase(unittest.TestCase):
+
+    def test_create_backend(self):
+        backend = create_backend('memory', endpoint='http://test_endpoint', project='test_project')
+
+        self.assertIsInstance(backend, MemoryBackend)
+
+    def test_create_unknown_backend(self):
+        self.assertRaises(ValueError, create_backend, 'unknown')
+
+
+class OldBackend(MemoryBackend):
+
+    def terminate(self, nowait=False):
+        self.nowait = nowait
+        return 0
+
+
+class TerminateTestCase(unittest.TestCase):
+
+    def test_terminate_old_backend(self):
+        backend = OldBackend()
+
+        left = terminate(backend, True, timeout=1.0, spill_path='spill.jsonl', progress=None)
+
+        expect(lambda: self.assertEqual(0, left))
+        expect(lambda: self.assertTrue(backend.nowait))
+        assert_expectations()
+
+    def test_terminate_passes_options(self):
+        calls = []
+
+        class Backend(MemoryBackend):
+            def terminate(self, nowait=False, timeout=None, **kwargs):
+                calls.append(dict(kwargs, nowait=nowait, timeout=timeout))
+
+        terminate(Backend(), timeout=1.0, spill_path='spill.jsonl')
+
+        self.assertEqual([{'nowait': False, 'timeout': 1.0, 'spill_path': 'spill.jsonl'}], calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import gzip
+import io
+import unittest
+from delayed_assert import expect, assert_expectations
+
+from nose_reportportal.budget import PayloadBudget
+
+
+class PayloadBudgetTestCase(unittest.TestCase):
+
+    def test_item_budget(self):
+        budget = PayloadBudget(item_bytes=10)
+
+        expect(lambda: self.assertTrue(budget.allow('item', 6)))
+        expect(lambda: self.assertFalse(budget.allow('item', 6)))
+        expect(lambda: self.assertTrue(budget.allow('other', 6)))
+        expect(lambda: self.assertTrue(budget.allow(None, 60)))
+        assert_expectations()
+
+    def test_overflow_continues_until_item_finishes(self):
+        budget = PayloadBudget(item_bytes=10)
+        budget.allow('item', 20)
+        budget.overflow('item', b'big\n')
+
+        expect(lambda: self.assertFalse(budget.allow('item', 1)))
+        records, data = budget.pop_overflow('item')
+        expect(lambda: self.assertEqual(1, records))
+        expect(lambda: self.assertEqual(b'big\n', gzip.GzipFile(fileobj=io.BytesIO(data)).read()))
+        expect(lambda: self.assertIsNone(budget.pop_overflow('item')))
+        assert_expectations()
+
+    def test_launch_budget(self):
+        budget = PayloadBudget(launch_bytes=10)
+        budget.allow('first', 8)
+
+        expect(lambda: self.assertFalse(budget.allow('second', 8)))
+        expect(lambda: self.assertFalse(budget.allow('third', 1)))
+        assert_expectations()
+
+    def test_attributes(self):
+        budget = PayloadBudget(launch_bytes=10)
+        budget.allow('item', 4)
+        budget.add_attachment(3)
+        budget.overflow('item', b'line\n')
+        budget.pop_overflow('item')
+
+        attributes = budget.attributes()
+
+        expect(lambda: self.assertEqual(1, attributes['inline_log_records']))
+        expect(lambda: self.assertEqual(1, attributes['compressed_log_records']))
+        expect(lambda: self.assertEqual(7 + attributes['compressed_log_gzip_bytes'], attributes['payload_bytes']))
+        assert_expectations()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import unittest
+from delayed_assert import expect, assert_expectations
+
+from nose_reportportal.capture import FDCapture
+
+
+class FDCaptureTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.capture = FDCapture(max_bytes=1024)
+
+    def tearDown(self):
+        self.capture.close()
+
+    def test_capture_descriptors(self):
+        self.capture.start()
+        os.write(1, b'to stdout\n')
+        os.write(2, b'to stderr\n')
+        subprocess.call([sys.executable, '-c', 'print("from subprocess")'])
+        output = self.capture.stop()
+
+        expect(lambda: self.assertEqual(b'to stdout\nto stderr\nfrom subprocess', output.strip()))
+        expect(lambda: self.assertFalse(self.capture.active))
+        assert_expectations()
+
+    def test_file_is_reused(self):
+        self.capture.start()
+        os.write(1, b'first')
+        self.capture.stop()
+        self.capture.start()
+        os.write(1, b'second')
+
+        self.assertEqual(b'second', self.capture.stop())
+
+    def test_truncate_large_output(self):
+        self.capture.start()
+        os.write(1, b'a' * 600 + b'b' * 5000 + b'c' * 600)
+        output = self.capture.stop()
+
+        expect(lambda: self.assertTrue(output.startswith(b'a' * 512)))
+        expect(lambda: self.assertTrue(output.endswith(b'c' * 512)))
+        expect(lambda: self.assertIn(b'... 5176 bytes truncated ...', output))
+        assert_expectations()
+
+    def test_stop_without_start(self):
+        self.assertEqual(b'', self.capture.stop())
+
+
+if __name__ == '__main__':
+    unittest.main()
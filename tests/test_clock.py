@@ -0,0 +1,27 @@
+import sys
+import time
+import unittest
+
+if sys.version_info >= (3, 3):
+    from unittest.mock import patch
+else:
+    from mock import patch
+
+from nose_reportportal.clock import timestamp
+
+
+class TimestampTestCase(unittest.TestCase):
+
+    def test_timestamp_is_wall_clock_milliseconds(self):
+        self.assertLess(abs(timestamp() - time.time() * 1000), 1000)
+
+    @patch('nose_reportportal.clock.time')
+    def test_timestamp_ignores_wall_clock_jumps(self, mocked_time):
+        before = timestamp()
+        mocked_time.return_value = 0
+
+        self.assertGreaterEqual(timestamp(), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import unittest
+from delayed_assert import expect, assert_expectations
+
+from nose_reportportal.config import Config, ConfigError, parse_overrides
+
+
+class ConfigTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'rp.ini')
+        with open(self.path, 'w') as f:
+            f.write('[base]\nrp_project = from_file\nrp_sample_rate = 0.5\nrp_resource_usage = yes\n'
+                    '[log_levels]\nApp.Module = ERROR\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_precedence(self):
+        config = Config.load(self.path,
+                             env={'RP_PROJECT': 'from_env', 'RP_SAMPLE_RATE': '0.25'},
+                             overrides={'rp_sample_rate': '0.1'})
+
+        expect(lambda: self.assertEqual('from_env', config.rp_project))
+        expect(lambda: self.assertEqual(0.1, config.rp_sample_rate))
+        expect(lambda: self.assertIs(True, config.rp_resource_usage))
+        expect(lambda: self.assertEqual(10, config.rp_resource_top))
+        expect(lambda: self.assertEqual({'App.Module': 'ERROR'}, config.log_levels))
+        expect(lambda: self.assertIsNone(config.attr_launch_names))
+        assert_expectations()
+
+    def test_serialization(self):
+        config = Config.load(self.path, env={})
+
+        loaded = Config.loads(config.dumps())
+
+        expect(lambda: self.assertEqual(config.values, loaded.values))
+        expect(lambda: self.assertEqual(config.log_levels, loaded.log_levels))
+        assert_expectations()
+
+    def test_validation(self):
+        expect(lambda: self.assertRaises(ConfigError, Config.load, self.path, {'RP_SAMPLE_RATE': '2'}))
+        expect(lambda: self.assertRaises(ConfigError, Config.load, self.path, {'RP_CAPTURE': 'pipe'}))
+        expect(lambda: self.assertRaises(ConfigError, Config.load, self.path, {'RP_RESOURCE_USAGE': 'maybe'}))
+        expect(lambda: self.assertRaises(ConfigError, Config.load, self.path, {}, {'rp_unknown': '1'}))
+        expect(lambda: self.assertRaises(ConfigError, Config.load, self.path,
+                                         {'RP_BACKEND': 'async', 'RP_JOURNAL_PATH': 'rp_journal.jsonl'}))
+        assert_expectations()
+
+    def test_parse_overrides(self):
+        expect(lambda: self.assertEqual({'rp_sample_rate': '0.1'}, parse_overrides(['rp_sample_rate = 0.1'])))
+        expect(lambda: self.assertRaises(ConfigError, parse_overrides, ['rp_sample_rate']))
+        assert_expectations()
+
+
+if __name__ == '__main__':
+    unittest.main()
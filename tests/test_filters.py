@@ -0,0 +1,59 @@
+import logging
+import unittest
+from delayed_assert import expect, assert_expectations
+
+from nose_reportportal.filters import LoggerMatcher
+
+
+def make_record(name, level=logging.INFO):
+    return logging.LogRecord(name, level, __file__, 0, 'message', None, None)
+
+
+class LoggerMatcherTestCase(unittest.TestCase):
+
+    def test_no_filters(self):
+        matcher = LoggerMatcher()
+
+        self.assertTrue(matcher.allow(make_record('any.logger')))
+
+    def test_exclude(self):
+        matcher = LoggerMatcher(['-nose', '-urllib3'])
+
+        expect(lambda: self.assertFalse(matcher.allow(make_record('nose'))))
+        expect(lambda: self.assertFalse(matcher.allow(make_record('nose.plugins'))))
+        expect(lambda: self.assertTrue(matcher.allow(make_record('nosey'))))
+        expect(lambda: self.assertTrue(matcher.allow(make_record('app'))))
+        assert_expectations()
+
+    def test_include(self):
+        matcher = LoggerMatcher(['app', '-app.db'])
+
+        expect(lambda: self.assertTrue(matcher.allow(make_record('app.web'))))
+        expect(lambda: self.assertFalse(matcher.allow(make_record('app.db.pool'))))
+        expect(lambda: self.assertFalse(matcher.allow(make_record('other'))))
+        assert_expectations()
+
+    def test_glob(self):
+        matcher = LoggerMatcher(['-*.connectionpool', '-app.worker?'])
+
+        expect(lambda: self.assertFalse(matcher.allow(make_record('urllib3.connectionpool'))))
+        expect(lambda: self.assertFalse(matcher.allow(make_record('app.worker1'))))
+        expect(lambda: self.assertTrue(matcher.allow(make_record('app.worker10'))))
+        expect(lambda: self.assertFalse(matcher.allow(make_record('app.workers.x.y'))))
+        assert_expectations()
+
+    def test_levels(self):
+        matcher = LoggerMatcher(levels={'app': 'WARNING', 'app.db': 'ERROR'})
+
+        expect(lambda: self.assertFalse(matcher.allow(make_record('app.web', logging.INFO))))
+        expect(lambda: self.assertTrue(matcher.allow(make_record('app.web', logging.WARNING))))
+        expect(lambda: self.assertFalse(matcher.allow(make_record('app.db', logging.WARNING))))
+        expect(lambda: self.assertTrue(matcher.allow(make_record('other', logging.DEBUG))))
+        assert_expectations()
+
+    def test_unknown_level(self):
+        self.assertRaises(ValueError, LoggerMatcher, levels={'app': 'LOUD'})
+
+
+if __name__ == '__main__':
+    unittest.main()
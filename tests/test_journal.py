@@ -0,0 +1,167 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from delayed_assert import expect, assert_expectations
+
+from nose_reportportal.backends import MemoryBackend
+from nose_reportportal.journal import JournalBackend, replay
+
+
+class JournalBackendTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'journal.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @staticmethod
+    def _die(journal):
+        # the process dies, without terminate(), releasing its files
+        journal._file.close()
+        journal._lock_file.close()
+
+    def _interrupted_run(self):
+        journal = JournalBackend(MemoryBackend(), self.path)
+        journal.start_launch(name='launch', start_time='1')
+        item_id = journal.start_test_item(name='test', start_time='2', item_type='TEST')
+        journal.log(time='3', message='message', item_id=item_id)
+        self._die(journal)
+        return journal.launch_id, item_id
+
+    def test_terminate_removes_journal(self):
+        journal = JournalBackend(MemoryBackend(), self.path)
+        journal.start_launch(name='launch', start_time='1')
+        journal.finish_launch(end_time='2')
+
+        journal.terminate()
+
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_terminate_keeps_journal_with_requests_left(self):
+        backend = MemoryBackend()
+        backend.terminate = lambda *args, **kwargs: 3
+        journal = JournalBackend(backend, self.path)
+        journal.start_launch(name='launch', start_time='1')
+
+        left = journal.terminate(timeout=1.0)
+
+        expect(lambda: self.assertEqual(3, left))
+        expect(lambda: self.assertTrue(os.path.exists(self.path)))
+        assert_expectations()
+
+    def test_recover_finishes_interrupted_launch(self):
+        launch_id, item_id = self._interrupted_run()
+        backend = MemoryBackend()
+        journal = JournalBackend(backend, self.path)
+
+        replayed = journal.recover()
+
+        expect(lambda: self.assertEqual(1, replayed))
+        expect(lambda: self.assertEqual(['finish_test_item', 'finish_launch'],
+                                        [event['event'] for event in backend.events]))
+        expect(lambda: self.assertEqual(item_id, backend.events[0]['item_id']))
+        expect(lambda: self.assertEqual('INTERRUPTED', backend.events[0]['status']))
+        expect(lambda: self.assertEqual(launch_id, backend.events[1]['launch_id']))
+        expect(lambda: self.assertIsNone(backend.launch_id))
+        assert_expectations()
+
+    def test_recover_replays_unacknowledged_calls(self):
+        launch_id, item_id = self._interrupted_run()
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'seq': 4, 'call': 'finish_test_item', 'launch': launch_id,
+                                'kwargs': {'item_id': item_id, 'end_time': '4', 'status': 'PASSED'}}) + '\n')
+            f.write('{"seq": 5, "call": "lo')
+        backend = MemoryBackend()
+        journal = JournalBackend(backend, self.path)
+
+        journal.recover()
+
+        expect(lambda: self.assertEqual(['finish_test_item', 'finish_launch'],
+                                        [event['event'] for event in backend.events]))
+        expect(lambda: self.assertEqual('PASSED', backend.events[0]['status']))
+        assert_expectations()
+
+    def test_recover_leaves_attached_launch_running(self):
+        journal = JournalBackend(MemoryBackend(), self.path)
+        journal.attach_launch('shared-launch')
+        item_id = journal.start_test_item(name='test', start_time='2', item_type='TEST')
+        self._die(journal)
+        backend = MemoryBackend()
+
+        JournalBackend(backend, self.path).recover()
+
+        expect(lambda: self.assertEqual(['finish_test_item'], [event['event'] for event in backend.events]))
+        expect(lambda: self.assertEqual(item_id, backend.events[0]['item_id']))
+        assert_expectations()
+
+    def test_replay_maps_spilled_ids(self):
+        with open(self.path, 'w') as f:
+            f.write(json.dumps({'seq': 1, 'call': 'start_test_item', 'launch': 'launch', 'id': 'client-item',
+                                'kwargs': {'name': 'test', 'start_time': '1', 'item_type': 'TEST'}}) + '\n')
+            f.write(json.dumps({'seq': 2, 'call': 'finish_test_item', 'launch': 'launch',
+                                'kwargs': {'item_id': 'client-item', 'end_time': '2', 'status': 'PASSED'}}) + '\n')
+        backend = MemoryBackend()
+
+        replay(self.path, backend)
+
+        expect(lambda: self.assertEqual(['start_test_item', 'finish_test_item'],
+                                        [event['event'] for event in backend.events]))
+        expect(lambda: self.assertEqual(backend.events[0]['item_id'], backend.events[1]['item_id']))
+        assert_expectations()
+
+    def test_recover_leaves_live_journal(self):
+        first = JournalBackend(MemoryBackend(), self.path)
+        first.start_launch(name='launch', start_time='1')
+        first.start_test_item(name='test', start_time='2', item_type='TEST')
+        backend = MemoryBackend()
+        second = JournalBackend(backend, self.path)
+
+        replayed = second.recover()
+        second.start_launch(name='other launch', start_time='3')
+
+        expect(lambda: self.assertEqual(0, replayed))
+        expect(lambda: self.assertEqual(['start_launch'], [event['event'] for event in backend.events]))
+        expect(lambda: self.assertEqual(self.path, first.path))
+        expect(lambda: self.assertNotEqual(self.path, second.path))
+        # the two calls of the first process and their acknowledgements
+        with open(self.path) as f:
+            lines = f.readlines()
+        expect(lambda: self.assertEqual(4, len(lines)))
+        assert_expectations()
+        second.terminate()
+        first.terminate()
+
+    def test_recover_journal_of_dead_process(self):
+        first = JournalBackend(MemoryBackend(), self.path)
+        second = JournalBackend(MemoryBackend(), self.path)
+        second.start_launch(name='launch', start_time='1')
+        self._die(second)
+        backend = MemoryBackend()
+        first.backend = backend
+
+        replayed = first.recover()
+
+        expect(lambda: self.assertEqual(1, replayed))
+        expect(lambda: self.assertEqual(['finish_launch'], [event['event'] for event in backend.events]))
+        expect(lambda: self.assertEqual([os.path.basename(self.path), os.path.basename(self.path) + '.lock'],
+                                        sorted(os.listdir(self.directory))))
+        assert_expectations()
+        first.terminate()
+
+    def test_recover_without_journal(self):
+        backend = MemoryBackend()
+        journal = JournalBackend(backend, self.path)
+
+        replayed = journal.recover()
+
+        expect(lambda: self.assertEqual(0, replayed))
+        expect(lambda: self.assertEqual([], backend.events))
+        assert_expectations()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import sys
+import unittest
+from delayed_assert import expect, assert_expectations
+
+if sys.version_info >= (3, 3):
+    from unittest.mock import Mock
+else:
+    from mock import Mock
+
+from nose.case import FunctionTestCase, MethodTestCase
+from nose.plugins.attrib import attr
+from nose.pyversion import unbound_method
+
+from nose_reportportal import metadata
+
+
+def nose_test(case):
+    # nose.case.Test doesn't work on Python 3.10+, it only wraps the case
+    test = Mock()
+    test.test = case
+    return test
+
+
+def check_value(number, name='default'):
+    pass
+
+
+def generator_test():
+    for i in range(3):
+        yield check_value, i
+
+
+class GeneratorClass(object):
+
+    def test_method(self):
+        pass
+
+
+@attr(type='unit')
+class SampleTestCase(unittest.TestCase):
+    suites = ['smoke']
+
+    @attr('slow')
+    def runTest(self):
+        """Sample test."""
+
+
+@attr('slow', type='unit')
+class DataTestCase(unittest.TestCase):
+    url = 'http://example.com'
+    data = [1, 2, 3]
+    mapping = {'key': 'value'}
+    missing = None
+
+    def runTest(self):
+        pass
+
+
+class TestMetadataCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = metadata.TestMetadataCache()
+        self.ev = Mock()
+        self.ev.describeTest.side_effect = lambda test: test.test._testMethodDoc
+
+    def test_generated_tests_share_metadata(self):
+        tests = [nose_test(FunctionTestCase(check_value, arg=(i,), descriptor=generator_test)) for i in range(3)]
+
+        results = [self.cache.get(self.ev, test) for test in tests]
+
+        expect(lambda: self.assertEqual(1, self.ev.describeTest.call_count))
+        expect(lambda: self.assertTrue(all(result[0] is results[0][0] for result in results)))
+        expect(lambda: self.assertEqual('tests.test_metadata:generator_test', results[0][0].code_ref))
+        expect(lambda: self.assertEqual('tests.test_metadata:generator_test[2]',
+                                        results[2][0].test_case_id(results[2][1])))
+        expect(lambda: self.assertEqual({'number': '2'}, results[2][0].parameters(results[2][1])))
+        assert_expectations()
+
+    def test_method_test_case(self):
+        test = nose_test(MethodTestCase(unbound_method(GeneratorClass, GeneratorClass.test_method)))
+
+        test_metadata, arg = self.cache.get(self.ev, test)
+
+        expect(lambda: self.assertEqual('tests.test_metadata:GeneratorClass.test_method', test_metadata.code_ref))
+        expect(lambda: self.assertEqual(test_metadata.code_ref, test_metadata.test_case_id(arg)))
+        assert_expectations()
+
+    def test_unittest_test_case(self):
+        test = nose_test(SampleTestCase())
+
+        test_metadata, _ = self.cache.get(self.ev, test)
+
+        expect(lambda: self.assertEqual('tests.test_metadata:SampleTestCase.runTest', test_metadata.code_ref))
+        expect(lambda: self.assertEqual('Sample test.', test_metadata.description))
+        expect(lambda: self.assertEqual([{'value': 'smoke'}, {'key': 'type', 'value': 'unit'}, {'value': 'slow'}],
+                                        test_metadata.attributes))
+        assert_expectations()
+
+    def test_class_data_is_not_reported(self):
+        test_metadata, _ = self.cache.get(self.ev, nose_test(DataTestCase()))
+
+        self.assertEqual([{'value': 'slow'}, {'key': 'type', 'value': 'unit'},
+                          {'key': 'url', 'value': 'http://example.com'}], test_metadata.attributes)
+
+    def test_ignored_tags(self):
+        cache = metadata.TestMetadataCache(ignored_tags=['smoke', 'type'])
+
+        test_metadata, _ = cache.get(self.ev, nose_test(SampleTestCase()))
+
+        self.assertEqual([{'value': 'slow'}], test_metadata.attributes)
+
+    def test_parameters_without_names(self):
+        test_metadata = metadata.TestMetadata(None, [], None, arg_names=('first',))
+
+        self.assertEqual({'first': '1', 'arg1': '2'}, test_metadata.parameters((1, 2)))
+
+    def test_unknown_test_is_not_cached(self):
+        self.cache.get(self.ev, Mock())
+        self.cache.get(self.ev, Mock())
+
+        self.assertEqual(2, self.ev.describeTest.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
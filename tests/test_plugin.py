@@ -1,4 +1,10 @@
+import io
+import logging
+import os
+import shutil
 import sys
+import tempfile
+import threading
 import unittest
 import traceback
 import random
@@ -13,7 +19,12 @@ else:
 from nose import SkipTest
 from nose.plugins.deprecated import DeprecatedTest
 
-from nose_reportportal.plugin import ReportPortalPlugin
+from nose_reportportal.budget import PayloadBudget
+from nose_reportportal.plugin import ReportPortalPlugin, RPNoseLogHandler, LogContext, current_log_context, \
+    attributes_from_attrs
+from nose_reportportal.sampling import PassSampler
+
+from .nose_run import NoseRunTestCase
 
 
 class TestException(Exception):
@@ -26,7 +37,14 @@ class ReportPortalPluginTestCase(unittest.TestCase):
         self.plugin = ReportPortalPlugin()
         self.test_object = Mock()
         self.test_object.status = None
+        self.test_object.errors = None
+        self.test_object.item_finished = False
         self.plugin.service = Mock()
+        self.plugin.handler = Mock()
+        self.plugin.handler.drain.return_value = []
+
+    def tearDown(self):
+        LogContext.unbind()
 
     def test_addSuccess(self):
         self.plugin.addSuccess(self.test_object)
@@ -114,13 +132,68 @@ class ReportPortalPluginTestCase(unittest.TestCase):
 
     @patch.object(ReportPortalPlugin, '_restore_stdout')
     def test_finalize(self, mocked__restore_stdout):
+        self.plugin.service.terminate_service.return_value = None
+
         self.plugin.finalize(result=Mock())
 
         expect(lambda: self.plugin.service.finish_launch.assert_called_once_with())
-        expect(lambda: self.plugin.service.terminate_service.assert_called_once_with())
+        expect(lambda: self.plugin.service.terminate_service.assert_called_once_with(
+            timeout=None, spill_path=None, progress=self.plugin._shutdown_progress))
         expect(lambda: mocked__restore_stdout.assert_called_once_with())
         assert_expectations()
 
+    @patch.object(ReportPortalPlugin, '_restore_stdout')
+    def test_finalize_posts_resource_report_before_launch_finish(self, mocked__restore_stdout):
+        self.plugin.resources = Mock()
+        self.plugin.service.terminate_service.return_value = None
+
+        self.plugin.finalize(result=Mock())
+
+        calls = [c[0] for c in self.plugin.service.mock_calls]
+        expect(lambda: self.plugin.service.post_log.assert_called_once_with(
+            self.plugin.resources.report.return_value))
+        expect(lambda: self.assertLess(calls.index('post_log'), calls.index('finish_launch')))
+        assert_expectations()
+
+    @patch('sys.stderr')
+    @patch.object(ReportPortalPlugin, '_restore_stdout')
+    def test_finalize_prints_budget_report(self, mocked__restore_stdout, mocked_stderr):
+        self.plugin.rp_launch_id = 'launch'
+        self.plugin.log_budget = PayloadBudget()
+        self.plugin.service.terminate_service.return_value = None
+
+        self.plugin.finalize(result=Mock())
+
+        mocked_stderr.write.assert_called_once_with('Report Portal: {0}\n'.format(self.plugin.log_budget.report()))
+
+    @patch('sys.stderr')
+    @patch.object(ReportPortalPlugin, '_restore_stdout')
+    def test_finalize_prints_sampling_report(self, mocked__restore_stdout, mocked_stderr):
+        self.plugin.rp_launch_id = 'launch'
+        self.plugin.sampler = PassSampler(0.5)
+        self.plugin.sampler.add_sampled_out(10)
+        self.plugin.service.terminate_service.return_value = None
+
+        self.plugin.finalize(result=Mock())
+
+        mocked_stderr.write.assert_called_once_with('Report Portal: {0}\n'.format(self.plugin.sampler.report()))
+
+    @patch.object(ReportPortalPlugin, '_restore_stdout')
+    def test_finalize_shard(self, mocked__restore_stdout):
+        self.plugin.rp_launch_id = 'launch'
+
+        self.plugin.service.terminate_service.return_value = None
+
+        self.plugin.finalize(result=Mock())
+
+        calls = [c[0] for c in self.plugin.service.mock_calls]
+        expect(lambda: self.plugin.service.finish_launch.assert_not_called())
+        expect(lambda: self.plugin.service.post_overflow.assert_called_once_with(None))
+        expect(lambda: self.assertLess(calls.index('post_overflow'), calls.index('terminate_service')))
+        expect(lambda: self.plugin.service.terminate_service.assert_called_once_with(
+            timeout=None, spill_path=None, progress=self.plugin._shutdown_progress))
+        assert_expectations()
+
     @patch.object(ReportPortalPlugin, 'setupLoghandler')
     @patch.object(ReportPortalPlugin, 'start')
     def test_start_test(self, mocked_start, mocked_setupLoghandler):
@@ -132,6 +205,8 @@ class ReportPortalPluginTestCase(unittest.TestCase):
         expect(lambda: self.assertIsNone(self.test_object.status))
         expect(lambda: self.assertIsNone(self.test_object.errors))
         expect(lambda: self.plugin.service.start_nose_item.assert_called_once_with(self.plugin, self.test_object))
+        expect(lambda: self.plugin.handler.activate.assert_called_once_with(self.test_object.log_context))
+        expect(lambda: self.assertIs(self.test_object.log_context, current_log_context()))
         expect(lambda: mocked_start.assert_called_once_with())
         expect(lambda: mocked_setupLoghandler.assert_called_once_with())
         assert_expectations()
@@ -156,20 +231,153 @@ class ReportPortalPluginTestCase(unittest.TestCase):
 
     def test_formatLogRecords(self):
         self.plugin.handler = Mock()
-        self.plugin.handler.buffer = ['val1', TestException('val2')]
+        self.plugin.handler.drain.return_value = ['val1', TestException('val2')]
         expected_result = ['val1', 'val2']
 
         result = self.plugin.formatLogRecords()
 
         self.assertEqual(expected_result, result)
 
+    def test_stopTest_with_sampled_out_success(self):
+        self.plugin.sampler = Mock()
+        self.plugin.sampler.keep.return_value = False
+        self.test_object.status = 'success'
+        self.test_object.test_item = None
+        self.test_object.start_time = 0
+
+        self.plugin.stopTest(self.test_object)
+
+        expect(lambda: self.plugin.service.start_nose_item.assert_not_called())
+        expect(lambda: self.plugin.service.finish_nose_item.assert_not_called())
+        expect(lambda: self.assertEqual(1, self.plugin.sampler.add_sampled_out.call_count))
+        assert_expectations()
+
+    @patch.object(ReportPortalPlugin, '_stop_test_3')
+    @patch.object(ReportPortalPlugin, '_stop_test_2')
+    def test_stopTest_with_sampled_failure(self, mocked__stop_test_2, mocked__stop_test_3):
+        self.plugin.sampler = Mock()
+        self.plugin.sampler.keep.return_value = False
+        self.test_object.status = 'failed'
+        self.test_object.test_item = None
+        self.test_object.start_time = 123456789
+        self.test_object.errors = None
+        self.plugin.handler.drain.return_value = []
+
+        self.plugin.stopTest(self.test_object)
+
+        self.plugin.service.start_nose_item.assert_called_once_with(self.plugin, self.test_object,
+                                                                    start_time=123456789)
+
+    @patch.object(ReportPortalPlugin, '_stop_test_3')
+    @patch.object(ReportPortalPlugin, '_stop_test_2')
+    def test_stopTest_posts_profile_of_slow_test(self, mocked__stop_test_2, mocked__stop_test_3):
+        self.plugin.profiler = Mock()
+        self.plugin.profiler.stop.return_value.duration_ms = 1500
+        self.plugin.profile_threshold_ms = 1000
+        self.test_object.errors = None
+        self.plugin.handler.drain.return_value = []
+
+        self.plugin.stopTest(self.test_object)
+
+        self.plugin.service.post_log.assert_called_once_with(
+            'Profile of a test which took 1500 ms',
+            attachment=self.plugin.profiler.stop.return_value.attachment.return_value,
+            item_id=self.test_object.test_item)
+
+    @patch.object(ReportPortalPlugin, '_stop_test_3')
+    @patch.object(ReportPortalPlugin, '_stop_test_2')
+    def test_stopTest_skips_profile_of_fast_test(self, mocked__stop_test_2, mocked__stop_test_3):
+        self.plugin.profiler = Mock()
+        self.plugin.profiler.stop.return_value.duration_ms = 10
+        self.plugin.profile_threshold_ms = 1000
+        self.test_object.errors = None
+        self.plugin.handler.drain.return_value = []
+
+        self.plugin.stopTest(self.test_object)
+
+        expect(lambda: self.plugin.service.post_log.assert_not_called())
+        expect(lambda: self.plugin.profiler.stop.return_value.attachment.assert_not_called())
+        assert_expectations()
+
+    @patch.object(ReportPortalPlugin, '_stop_test_3')
+    @patch.object(ReportPortalPlugin, '_stop_test_2')
+    def test_fd_capture_stops_at_outcome(self, mocked__stop_test_2, mocked__stop_test_3):
+        self.plugin.fd_capture = Mock(active=True)
+        self.plugin.fd_capture.stop.return_value = b'output'
+        self.test_object.errors = None
+        self.plugin.handler.drain.return_value = []
+
+        self.plugin.addSuccess(self.test_object)
+        self.plugin.fd_capture.active = False
+        self.plugin.stopTest(self.test_object)
+
+        expect(lambda: self.assertEqual(1, self.plugin.fd_capture.stop.call_count))
+        expect(lambda: self.plugin.service.post_log.assert_called_once_with(
+            'Output of the test and its subprocesses',
+            attachment={'name': 'output.txt', 'data': b'output', 'mime': 'text/plain'},
+            item_id=self.test_object.test_item))
+        assert_expectations()
+
+    def test_item_finished_at_outcome(self):
+        self.plugin.handler.drain.side_effect = [[(123, 'tests: INFO: message')], []]
+
+        self.plugin.addSuccess(self.test_object)
+        self.plugin.stopTest(self.test_object)
+
+        calls = [c[0] for c in self.plugin.service.mock_calls]
+        expect(lambda: self.assertEqual(['finish_nose_item', 'post_log', 'post_overflow'], calls))
+        expect(lambda: self.plugin.service.post_log.assert_called_once_with(
+            'tests: INFO: message', item_id=self.test_object.test_item, log_time=123))
+        assert_expectations()
+
+    def test_error_after_outcome(self):
+        try:
+            raise TestException('tearDown')
+        except TestException:
+            err = sys.exc_info()
+
+        self.plugin.addSuccess(self.test_object)
+        self.plugin.handler.drain.return_value = [(123, 'tests: INFO: tearing down')]
+        self.plugin.addError(self.test_object, err)
+        self.plugin.stopTest(self.test_object)
+
+        expect(lambda: self.assertEqual(1, self.plugin.service.finish_nose_item.call_count))
+        expect(lambda: self.assertEqual(
+            ['tearDown', 'tests: INFO: tearing down'],
+            [c[0][0] for c in self.plugin.service.post_log.call_args_list if c[0][0] != self.test_object.errors[1]]))
+        assert_expectations()
+
+    def test__stop_test_3_with_cleared_outcome(self):
+        self.test_object.test._outcome = None
+        self.test_object.status = 'success'
+
+        self.plugin._stop_test_3(self.test_object)
+
+        self.plugin.service.finish_nose_item.assert_called_once_with(self.test_object.test_item, status='PASSED',
+                                                                     attributes=None)
+
+    def test__stop_test_2_with_known_issue(self):
+        self.plugin.known_issues = Mock()
+        self.test_object.status = 'failed'
+        self.test_object.failure_signature = 'signature'
+
+        self.plugin._stop_test_2(self.test_object)
+
+        expect(lambda: self.plugin.known_issues.issue.assert_called_once_with('signature'))
+        expect(lambda: self.plugin.service.finish_nose_item.assert_called_once_with(
+            self.test_object.test_item, status='FAILED',
+            attributes=[{'key': 'failure_signature', 'value': 'signature'}],
+            issue=self.plugin.known_issues.issue.return_value))
+        assert_expectations()
+
     def test__stop_test_2_with_test_status_skipped(self):
         self.test_object.status = 'skipped'
         self.test_object.test_item = 0
 
         self.plugin._stop_test_2(self.test_object)
 
-        self.plugin.service.finish_nose_item.assert_called_once_with(self.test_object.test_item, status='SKIPPED')
+        self.plugin.service.finish_nose_item.assert_called_once_with(self.test_object.test_item, status='SKIPPED',
+                                                                     attributes=None)
 
     def test__stop_test_2_with_test_status_success(self):
         self.test_object.status = 'success'
@@ -177,7 +385,8 @@ class ReportPortalPluginTestCase(unittest.TestCase):
 
         self.plugin._stop_test_2(self.test_object)
 
-        self.plugin.service.finish_nose_item.assert_called_once_with(self.test_object.test_item, status='PASSED')
+        self.plugin.service.finish_nose_item.assert_called_once_with(self.test_object.test_item, status='PASSED',
+                                                                     attributes=None)
 
     def test__stop_test_2_with_test_other_status(self):
         self.test_object.status = 'other'
@@ -185,7 +394,8 @@ class ReportPortalPluginTestCase(unittest.TestCase):
 
         self.plugin._stop_test_2(self.test_object)
 
-        self.plugin.service.finish_nose_item.assert_called_once_with(self.test_object.test_item, status='FAILED')
+        self.plugin.service.finish_nose_item.assert_called_once_with(self.test_object.test_item, status='FAILED',
+                                                                     attributes=None, issue=None)
 
     def test__stop_test_3_with_test_status_skipped(self):
         self.test_object.test._outcome.skipped = True
@@ -195,7 +405,8 @@ class ReportPortalPluginTestCase(unittest.TestCase):
 
         self.plugin._stop_test_3(self.test_object)
 
-        self.plugin.service.finish_nose_item.assert_called_once_with(self.test_object.test_item, status='SKIPPED')
+        self.plugin.service.finish_nose_item.assert_called_once_with(self.test_object.test_item, status='SKIPPED',
+                                                                     attributes=None)
 
     def test__stop_test_3_with_test_status_success(self):
         self.test_object.test._outcome.skipped = False
@@ -205,7 +416,8 @@ class ReportPortalPluginTestCase(unittest.TestCase):
 
         self.plugin._stop_test_3(self.test_object)
 
-        self.plugin.service.finish_nose_item.assert_called_once_with(self.test_object.test_item, status='PASSED')
+        self.plugin.service.finish_nose_item.assert_called_once_with(self.test_object.test_item, status='PASSED',
+                                                                     attributes=None)
 
     def test__stop_test_3_with_test_other_status(self):
         self.test_object.test._outcome.skipped = False
@@ -215,7 +427,176 @@ class ReportPortalPluginTestCase(unittest.TestCase):
 
         self.plugin._stop_test_3(self.test_object)
 
-        self.plugin.service.finish_nose_item.assert_called_once_with(self.test_object.test_item, status='FAILED')
+        self.plugin.service.finish_nose_item.assert_called_once_with(self.test_object.test_item, status='FAILED',
+                                                                     attributes=None, issue=None)
+
+
+class PluginRunTestCase(NoseRunTestCase):
+
+    def test_fd_capture_in_verbose_run(self):
+        # the runner writes to file descriptor 2, as it does from a terminal
+        stderr = io.open(2, 'w', closefd=False)
+
+        with patch('sys.stderr', stderr):
+            self.run_nose('import os\n\n\ndef test_a():\n    os.write(1, b"hello fd\\n")\n',
+                          settings='rp_backend = test\nrp_capture = fd', args=['-v'])
+
+        attachments = [event['attachment'] for event in self.backends[0].events
+                       if event['event'] == 'log' and event['attachment']]
+        self.assertEqual([b'hello fd\n'], [attachment['data'] for attachment in attachments])
+
+    def test_failing_module_fixture(self):
+        success = self.run_nose('def setup_module():\n    raise RuntimeError("fixture")\n\n\n'
+                                'def test_a():\n    pass\n')
+
+        events = [event['event'] for event in self.backends[0].events]
+        expect(lambda: self.assertFalse(success))
+        expect(lambda: self.assertNotIn('start_test_item', events))
+        expect(lambda: self.assertEqual('finish_launch', events[-1]))
+        assert_expectations()
+
+
+class ConfigureTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.directory, 'rp.ini')
+        self.plugin = ReportPortalPlugin()
+        self.options = Mock(rp_config=self.config_path, rp_launch=None, rp_mode='DEFAULT',
+                            rp_launch_description='', ignore_loggers=[], attr=None, rp_launch_id=None,
+                            rp_options=[], rp_resolved_config=None)
+        self.options.enable_plugin_reportportal = True
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _configure(self, content):
+        with open(self.config_path, 'w') as f:
+            f.write(content)
+        self.plugin.configure(self.options, Mock())
+
+    def test_launch_name_from_attr(self):
+        self.options.attr = ['type=integration,slow']
+
+        self._configure('[base]\nrp_launch = Launch {}\n')
+
+        expect(lambda: self.assertEqual('Launch (integration tests)', self.plugin.rp_launch))
+        expect(lambda: self.assertEqual([{'key': 'type', 'value': 'integration'}, {'value': 'slow'}],
+                                        self.plugin.rp_launch_attributes))
+        assert_expectations()
+
+    def test_launch_name_from_configured_attr(self):
+        self.options.attr = ['layer=api']
+
+        self._configure('[base]\nrp_launch = Launch {}\n[attr_launch_names]\n(API tests) = layer=api\n')
+
+        self.assertEqual('Launch (API tests)', self.plugin.rp_launch)
+
+    def test_launch_id_option_overrides_config(self):
+        self.options.rp_launch_id = 'from-option'
+
+        self._configure('[base]\nrp_launch_id = from-config\n')
+
+        self.assertEqual('from-option', self.plugin.rp_launch_id)
+
+    def test_rp_option_overrides_config(self):
+        self.options.rp_options = ['rp_sample_rate=0.5']
+
+        self._configure('[base]\nrp_sample_rate = 0.1\n')
+
+        self.assertEqual(0.5, self.plugin.sampler.rate)
+
+    def test_invalid_setting_fails(self):
+        with self.assertRaises(ValueError):
+            self._configure('[base]\nrp_sample_rate = often\n')
+
+    def test_endpoint_is_not_exported(self):
+        self._configure('[base]\nrp_endpoint = http://rp.example.com\n')
+
+        self.assertNotEqual('http://rp.example.com', os.environ.get('RP_ENDPOINT'))
+
+    def test_worker_uses_resolved_config(self):
+        self._configure('[base]\nrp_endpoint = http://rp.example.com\n[log_levels]\napp = WARNING\n')
+        os.remove(self.config_path)
+        worker = ReportPortalPlugin()
+
+        worker.configure(self.options, Mock())
+
+        expect(lambda: self.assertEqual('http://rp.example.com', worker.rp_endpoint))
+        expect(lambda: self.assertEqual({'app': 'WARNING'}, worker.log_levels))
+        assert_expectations()
+
+    def test_attributes_from_attrs(self):
+        self.assertEqual([{'value': 'slow'}, {'key': 'type', 'value': 'unit'}],
+                         attributes_from_attrs(['slow', '!fast', 'type=unit']))
+
+
+class RPNoseLogHandlerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        LogContext.unbind()
+        self.handler = RPNoseLogHandler()
+        self.logger = logging.getLogger('tests.handler')
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        LogContext.unbind()
+
+    def test_emit_to_active_context(self):
+        context = LogContext()
+        self.handler.activate(context)
+
+        self.logger.info('message')
+
+        self.assertEqual(['tests.handler: INFO: message'], self.handler.drain(context))
+
+    def test_own_records_are_ignored(self):
+        # the transport logs its failures from its own thread
+        record = logging.LogRecord('nose_reportportal.aio', logging.ERROR, __file__, 1,
+                                   'Report Portal request failed', None, None)
+
+        self.assertFalse(self.handler.filter(record))
+
+    def test_emit_from_bound_thread(self):
+        first, second = LogContext(), LogContext()
+        self.handler.activate(first)
+        thread = threading.Thread(target=first.wrap(lambda: self.logger.info('from worker')))
+        self.handler.activate(second)
+
+        thread.start()
+        thread.join()
+
+        expect(lambda: self.assertEqual(['tests.handler: INFO: from worker'], first.drain()))
+        expect(lambda: self.assertEqual([], second.drain()))
+        assert_expectations()
+
+    def test_emit_from_many_threads(self):
+        context = LogContext()
+        self.handler.activate(context)
+
+        def worker():
+            for _ in range(100):
+                self.logger.info('message')
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(800, len(self.handler.drain()))
+
+    def test_truncate(self):
+        context = LogContext()
+        self.handler.activate(context)
+
+        self.handler.truncate()
+        self.logger.info('message')
+
+        expect(lambda: self.assertEqual([], context.drain()))
+        expect(lambda: self.assertEqual(1, len(self.handler.buffer)))
+        assert_expectations()
 
 
 if __name__ == '__main__':
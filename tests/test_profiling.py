@@ -0,0 +1,70 @@
+import gzip
+import io
+import time
+import unittest
+from delayed_assert import expect, assert_expectations
+
+from nose_reportportal.profiling import CProfileProfiler, SamplingProfiler, create_profiler
+
+
+def _unzip(attachment):
+    with gzip.GzipFile(fileobj=io.BytesIO(attachment['data'])) as f:
+        return f.read().decode('utf-8')
+
+
+def busy_function(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+
+
+class CProfileProfilerTestCase(unittest.TestCase):
+
+    def test_profile(self):
+        profiler = CProfileProfiler()
+        profiler.start()
+        busy_function(0.01)
+        profile = profiler.stop()
+
+        attachment = profile.attachment()
+
+        expect(lambda: self.assertGreaterEqual(profile.duration_ms, 10))
+        expect(lambda: self.assertEqual('application/gzip', attachment['mime']))
+        expect(lambda: self.assertIn('busy_function', _unzip(attachment)))
+        assert_expectations()
+
+
+class SamplingProfilerTestCase(unittest.TestCase):
+
+    def test_profile(self):
+        profiler = SamplingProfiler(interval_ms=1)
+        profiler.start()
+        busy_function(0.1)
+        profile = profiler.stop()
+
+        lines = _unzip(profile.attachment()).splitlines()
+
+        expect(lambda: self.assertTrue(lines))
+        expect(lambda: self.assertTrue(any('busy_function' in line for line in lines)))
+        expect(lambda: self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in lines)))
+        assert_expectations()
+
+    def test_restart_clears_samples(self):
+        profiler = SamplingProfiler(interval_ms=1)
+        profiler.start()
+        busy_function(0.05)
+        profiler.stop()
+        profiler.start()
+        profile = profiler.stop()
+
+        self.assertNotIn('busy_function', _unzip(profile.attachment()))
+
+
+class CreateProfilerTestCase(unittest.TestCase):
+
+    def test_unknown_profiler(self):
+        self.assertRaises(ValueError, create_profiler, 'unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
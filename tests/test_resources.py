@@ -0,0 +1,74 @@
+import unittest
+from delayed_assert import expect, assert_expectations
+
+try:
+    from unittest.mock import Mock, patch
+except ImportError:
+    from mock import Mock, patch
+
+from nose_reportportal.resources import ResourceCollector, rss_kb, snapshot
+
+
+class ResourceCollectorTestCase(unittest.TestCase):
+
+    def test_measure(self):
+        collector = ResourceCollector()
+        start = snapshot()
+        data = [0] * 1000000
+
+        usage = collector.measure('test', start)
+
+        expect(lambda: self.assertEqual('test', usage.name))
+        expect(lambda: self.assertGreaterEqual(usage.wall_ms, 0))
+        expect(lambda: self.assertGreaterEqual(usage.cpu_ms, 0))
+        expect(lambda: self.assertEqual(['wall_ms', 'cpu_ms', 'rss_delta_kb', 'gc_collections'],
+                                        [a['key'] for a in usage.attributes()]))
+        assert_expectations()
+        del data
+
+    def test_top(self):
+        collector = ResourceCollector(top=2)
+        for i, wall in enumerate([5, 1, 9, 3]):
+            collector.measure('test_%d' % i, (-wall / 1000.0, 0, 0, 0))
+
+        self.assertEqual(['test_2', 'test_0'], [usage.name for usage in collector.slowest()])
+
+    def test_report(self):
+        collector = ResourceCollector(top=1)
+        collector.measure('test_slow', snapshot())
+
+        report = collector.report()
+
+        expect(lambda: self.assertIn('Slowest tests', report))
+        expect(lambda: self.assertIn('test_slow', report))
+        assert_expectations()
+
+
+@patch('nose_reportportal.resources.open', Mock(side_effect=IOError), create=True)
+class RssTestCase(unittest.TestCase):
+
+    @patch('nose_reportportal.resources.psutil')
+    def test_psutil(self, mocked_psutil):
+        mocked_psutil.Process.return_value.memory_info.return_value.rss = 2048 * 1024
+
+        self.assertEqual(2048, rss_kb())
+
+    @patch('nose_reportportal.resources.psutil', None)
+    @patch('nose_reportportal.resources.resource')
+    @patch('sys.platform', 'darwin')
+    def test_peak_in_bytes_on_macos(self, mocked_resource):
+        mocked_resource.getrusage.return_value.ru_maxrss = 2048 * 1024
+
+        self.assertEqual(2048, rss_kb())
+
+    @patch('nose_reportportal.resources.psutil', None)
+    @patch('nose_reportportal.resources.resource')
+    @patch('sys.platform', 'freebsd12')
+    def test_peak_in_kilobytes(self, mocked_resource):
+        mocked_resource.getrusage.return_value.ru_maxrss = 2048
+
+        self.assertEqual(2048, rss_kb())
+
+
+if __name__ == '__main__':
+    unittest.main()
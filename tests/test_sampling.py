@@ -0,0 +1,45 @@
+import unittest
+from delayed_assert import expect, assert_expectations
+
+from nose_reportportal.sampling import PassSampler
+
+
+class PassSamplerTestCase(unittest.TestCase):
+
+    def test_keep_is_deterministic(self):
+        test_ids = ['tests.test_module.TestCase.test_%d' % i for i in range(1000)]
+
+        first = [PassSampler(0.1).keep(test_id) for test_id in test_ids]
+        second = [PassSampler(0.1).keep(test_id) for test_id in test_ids]
+
+        expect(lambda: self.assertEqual(first, second))
+        expect(lambda: self.assertTrue(50 < sum(first) < 150))
+        assert_expectations()
+
+    def test_keep_bounds(self):
+        expect(lambda: self.assertFalse(PassSampler(0).keep('test')))
+        expect(lambda: self.assertTrue(PassSampler(1).keep('test')))
+        assert_expectations()
+
+    def test_invalid_rate(self):
+        self.assertRaises(ValueError, PassSampler, 1.5)
+
+    def test_attributes(self):
+        sampler = PassSampler(0.5)
+
+        sampler.add_sampled_out(10)
+        sampler.add_sampled_out(5)
+
+        self.assertEqual({'sample_rate': 0.5, 'sampled_out_passed': 2, 'sampled_out_duration_ms': 15},
+                         sampler.attributes())
+
+    def test_report(self):
+        sampler = PassSampler(0.5)
+
+        sampler.add_sampled_out(10)
+
+        self.assertEqual('Sampling: 1 passed tests (10 ms) not reported at sample rate 0.5', sampler.report())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import gzip
+import io
 import sys
 import unittest
 from delayed_assert import delayed_assert, expect, assert_expectations
@@ -8,6 +10,7 @@ if sys.version_info >= (3, 3):
 else:
     from mock import Mock, patch
 
+from nose_reportportal.budget import PayloadBudget
 from nose_reportportal.service import NoseServiceClass
 
 
@@ -86,7 +89,7 @@ class NoseServiceClassTestCase(unittest.TestCase):
             start_time=time,
             description=None,
             mode=None,
-            tags=None
+            attributes=None
         )
 
     @patch('nose_reportportal.service.timestamp')
@@ -98,6 +101,7 @@ class NoseServiceClassTestCase(unittest.TestCase):
         mocked_timestamp.return_value = time
         test = Mock()
         test.test.suites = ['test_tag_1', 'test_tag_2']
+        expected_attributes = [{'value': 'test_tag_1'}, {'value': 'test_tag_2'}]
         name = str(test)
         ev = Mock()
         ev.describeTest.return_value = 'test_description'
@@ -107,10 +111,12 @@ class NoseServiceClassTestCase(unittest.TestCase):
         expect(lambda: self.service.rp.start_test_item.assert_called_once_with(
             name=name,
             description=ev.describeTest(),
-            tags=test.test.suites,
+            attributes=expected_attributes,
             start_time=mocked_timestamp(),
             item_type='TEST',
-            parameters=None
+            parameters=None,
+            code_ref=None,
+            test_case_id=None
         ))
         expect(lambda: self.service.post_log.assert_called_once_with(name))
 
@@ -131,7 +137,7 @@ class NoseServiceClassTestCase(unittest.TestCase):
         self.service.finish_nose_item(test_item=item_id, status=status, issue=issue)
 
         expect(lambda: self.service.rp.finish_test_item.assert_called_once_with(
-            end_time=time, issue=issue, item_id=item_id, status=status
+            end_time=time, issue=issue, item_id=item_id, status=status, attributes=None
         ))
         expect(lambda: self.service.post_log.assert_called_once_with(status))
         assert_expectations()
@@ -149,7 +155,8 @@ class NoseServiceClassTestCase(unittest.TestCase):
 
         self.service.rp.finish_launch.assert_called_once_with(
             end_time=time,
-            status=status
+            status=status,
+            attributes=None
         )
 
     @patch('nose_reportportal.service.timestamp')
@@ -166,8 +173,42 @@ class NoseServiceClassTestCase(unittest.TestCase):
             time=time,
             level='INFO',
             attachment=None,
+            item_id=None,
         )
 
+    def test_post_log_back_dated(self):
+        self.service.rp = Mock()
+
+        self.service.post_log('test_message', item_id='item', log_time=123)
+
+        self.service.rp.log.assert_called_once_with(
+            message='test_message',
+            time=123,
+            level='INFO',
+            attachment=None,
+            item_id='item',
+        )
+
+    @patch('nose_reportportal.service.timestamp')
+    def test_post_log_over_budget(self, mocked_timestamp):
+        self.service.rp = Mock()
+        self.service.budget = PayloadBudget(item_bytes=10)
+        mocked_timestamp.return_value = 123456789
+        try:
+            self.service.post_log('message 1', item_id='item')
+            self.service.post_log('message 2', item_id='item')
+            self.service.post_log('message 3', item_id='item')
+            self.service.post_overflow('item')
+        finally:
+            self.service.budget = None
+
+        messages = [c[1]['message'] for c in self.service.rp.log.call_args_list]
+        attachment = self.service.rp.log.call_args_list[-1][1]['attachment']
+        expect(lambda: self.assertEqual(['message 1', '2 log records over the payload budget'], messages))
+        expect(lambda: self.assertEqual(b'123456789 INFO message 2\n123456789 INFO message 3\n',
+                                        gzip.GzipFile(fileobj=io.BytesIO(attachment['data'])).read()))
+        assert_expectations()
+
     def test_get_issue_types_with_no_project_settiings(self):
         self.service.project_settings = None
 
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+from delayed_assert import expect, assert_expectations
+
+from nose_reportportal.backends import MemoryBackend
+from nose_reportportal.config import Config
+from nose_reportportal.journal import JournalBackend
+from nose_reportportal.shard import finish_launch, start_launch
+
+
+class ShardTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.directory, 'rp.ini')
+        with open(self.config_path, 'w') as f:
+            f.write('[base]\nrp_launch = Launch {}\nrp_launch_tags = Nose;Smoke\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_start_launch(self):
+        backend = MemoryBackend()
+
+        launch_id = start_launch(backend, Config.load(self.config_path, env={}), '(shards)')
+
+        event = backend.events[0]
+        expect(lambda: self.assertEqual(launch_id, event['launch_id']))
+        expect(lambda: self.assertEqual('Launch (shards)', event['name']))
+        expect(lambda: self.assertEqual([{'value': 'Nose'}, {'value': 'Smoke'}], event['attributes']))
+        assert_expectations()
+
+    def test_shards_report_to_one_launch(self):
+        launch_id = start_launch(MemoryBackend(), Config.load(self.config_path, env={}))
+        shards = [JournalBackend(MemoryBackend(), os.path.join(self.directory, 'journal%d' % i))
+                  for i in range(3)]
+        for shard in shards:
+            shard.attach_launch(launch_id)
+            shard.start_test_item(name='test', start_time=1, item_type='TEST')
+            shard.terminate()
+        coordinator = MemoryBackend()
+
+        finish_launch(coordinator, launch_id)
+
+        expect(lambda: self.assertEqual([launch_id] * 3, [s.launch_id for s in shards]))
+        expect(lambda: self.assertEqual(launch_id, coordinator.events[0]['launch_id']))
+        expect(lambda: self.assertEqual('finish_launch', coordinator.events[0]['event']))
+        assert_expectations()
+
+
+if __name__ == '__main__':
+    unittest.main()
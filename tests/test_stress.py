@@ -0,0 +1,235 @@
+"""Stress tests of the plugin running synthetic tests under nose.
+
+The volume is scaled by the ``RP_STRESS_SCALE`` environment variable, the
+default keeps the run short. A soak run with a million log records::
+
+    RP_STRESS_SCALE=1 python -m pytest tests/test_stress.py
+
+Memory is measured with tracemalloc, so only the allocations of Python
+objects count, and the throughput floors are low enough for slow CI
+machines: they catch hot paths becoming orders of magnitude slower.
+"""
+
+import os
+import textwrap
+import time
+import tracemalloc
+import unittest
+from collections import Counter
+from delayed_assert import expect, assert_expectations
+
+from nose_reportportal.backends import ReportingBackend
+
+from .nose_run import NoseRunTestCase
+from .stub_server import StubServer, web
+
+SCALE = float(os.environ.get('RP_STRESS_SCALE', '0.02'))
+MB = 1024 * 1024
+
+SYNTHETIC_TESTS = textwrap.dedent('''
+    import logging
+    import os
+    import sys
+    import threading
+
+    LOGGERS = [logging.getLogger('stress.{{0}}'.format(i)) for i in range({loggers})]
+
+
+    def emit(count, offset=0):
+        for i in range(count):
+            LOGGERS[(offset + i) % len(LOGGERS)].info('record %d of %d', i, count)
+
+
+    def test_logs():
+        for i in range({tests}):
+            yield emit, {records}, i * {records}
+
+
+    def test_threads():
+        threads = [threading.Thread(target=emit, args=({thread_records}, i)) for i in range({threads})]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+    def test_stdout():
+        line = 'x' * 1023 + '\\n'
+        for _ in range({stdout_kb}):
+            sys.stdout.write(line)
+
+
+    def test_fd_output():
+        chunk = b'y' * 1023 + b'\\n'
+        for _ in range({stdout_kb}):
+            os.write(1, chunk)
+''')
+
+
+class CountingBackend(ReportingBackend):
+    """Counts the reported events without keeping them."""
+
+    def __init__(self, **kwargs):
+        self.launch_id = None
+        self.started = {}
+        self.finished = {}
+        self.records = Counter()
+        self.message_sizes = Counter()
+        self.attachment_sizes = Counter()
+        self.launch_finished = False
+
+    def start_launch(self, name, start_time, description=None, attributes=None,
+                     mode=None, **kwargs):
+        self.launch_id = 'launch'
+        return self.launch_id
+
+    def finish_launch(self, end_time, status=None, attributes=None, **kwargs):
+        self.launch_finished = True
+
+    def start_test_item(self, name, start_time, item_type, description=None,
+                        attributes=None, parameters=None, parent_item_id=None,
+                        **kwargs):
+        item_id = str(len(self.started))
+        self.started[item_id] = name
+        return item_id
+
+    def finish_test_item(self, item_id, end_time, status, issue=None,
+                         attributes=None, **kwargs):
+        self.finished[item_id] = status
+
+    def log(self, time, message, level=None, attachment=None, item_id=None):
+        if message.startswith('stress.'):
+            self.records[self.started.get(item_id)] += 1
+        elif attachment:
+            self.attachment_sizes[self.started.get(item_id)] += len(attachment['data'])
+        else:
+            self.message_sizes[self.started.get(item_id)] += len(message)
+
+
+class SyntheticTestsCase(NoseRunTestCase):
+    """Runs the synthetic tests under nose with the plugin."""
+
+    backend_class = CountingBackend
+    module_name = 'synthetic_tests'
+
+    def run_synthetic(self, name, settings='rp_backend = test', loggers=100, tests=1, records=0,
+                      threads=0, thread_records=0, stdout_kb=0):
+        """Run the synthetic test ``name`` and return the number of seconds it took."""
+        source = SYNTHETIC_TESTS.format(loggers=loggers, tests=tests, records=records, threads=threads,
+                                        thread_records=thread_records, stdout_kb=stdout_kb)
+        start = time.monotonic()
+        # the plugin alone captures the output and the logs
+        self.run_nose(source, settings=settings, args=['--nocapture', '--nologcapture'], test=name)
+        return time.monotonic() - start
+
+
+class StressTestCase(SyntheticTestsCase):
+
+    def test_log_records(self):
+        tests = max(1, int(1000 * SCALE))
+
+        duration = self.run_synthetic('test_logs', loggers=5000, tests=tests, records=1000)
+
+        backend, = self.backends
+        expect(lambda: self.assertEqual(tests * 1000, sum(backend.records.values())))
+        expect(lambda: self.assertEqual(tests, len(backend.records)))
+        expect(lambda: self.assertEqual(set(['PASSED']), set(backend.finished.values())))
+        expect(lambda: self.assertEqual(len(backend.started), len(backend.finished)))
+        expect(lambda: self.assertTrue(backend.launch_finished))
+        expect(lambda: self.assertGreater(tests * 1000 / duration, 5000))
+        assert_expectations()
+
+    def test_memory_does_not_grow_with_records(self):
+        tests = max(1, int(1000 * SCALE))
+        tracemalloc.start()
+        try:
+            self.run_synthetic('test_logs', loggers=5000, tests=tests, records=1000)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        backend, = self.backends
+        expect(lambda: self.assertEqual(tests * 1000, sum(backend.records.values())))
+        # records are sent as soon as their test has an outcome
+        expect(lambda: self.assertLess(peak, 16 * MB))
+        assert_expectations()
+
+    def test_threads(self):
+        threads = 32
+        thread_records = max(1, int(100000 * SCALE) // threads)
+
+        self.run_synthetic('test_threads', loggers=2000, threads=threads, thread_records=thread_records)
+
+        backend, = self.backends
+        expect(lambda: self.assertEqual({'synthetic_tests.test_threads': threads * thread_records},
+                                        dict(backend.records)))
+        expect(lambda: self.assertEqual(['PASSED'], list(backend.finished.values())))
+        assert_expectations()
+
+    def test_stdout(self):
+        stdout_kb = 8 * 1024
+        tracemalloc.start()
+        try:
+            self.run_synthetic('test_stdout', stdout_kb=stdout_kb)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        backend, = self.backends
+        expect(lambda: self.assertEqual(stdout_kb * 1024, backend.message_sizes['synthetic_tests.test_stdout']))
+        # the buffer, its value and the copies made while it is sent
+        expect(lambda: self.assertLess(peak, 4 * stdout_kb * 1024))
+        assert_expectations()
+
+    def test_fd_output(self):
+        self.run_synthetic('test_fd_output', stdout_kb=8 * 1024, settings='''
+            rp_backend = test
+            rp_capture = fd
+            rp_capture_max_kb = 1024
+        ''')
+
+        backend, = self.backends
+        size = backend.attachment_sizes['synthetic_tests.test_fd_output']
+        expect(lambda: self.assertGreaterEqual(size, MB))
+        expect(lambda: self.assertLess(size, MB + 100))
+        assert_expectations()
+
+
+@unittest.skipIf(web is None, 'aiohttp is not installed')
+class StubServerStressTestCase(SyntheticTestsCase):
+
+    def setUp(self):
+        super(StubServerStressTestCase, self).setUp()
+        self.server = StubServer(delay=0.002, fail_every=50)
+        self.endpoint = self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+        super(StubServerStressTestCase, self).tearDown()
+
+    def test_log_records(self):
+        tests = max(1, int(100 * SCALE))
+        records = tests * 1000
+
+        duration = self.run_synthetic('test_logs', tests=tests, records=1000, settings='''
+            rp_backend = async
+            rp_endpoint = {0}
+            rp_project = stress
+            rp_async_concurrency = 20
+            rp_retries = 3
+        '''.format(self.endpoint))
+
+        methods = Counter(method for method, _ in self.server.requests)
+        item_logs = sum(count for item_id, count in self.server.item_logs.items() if item_id is not None)
+        # the requests the stub failed were sent again
+        expect(lambda: self.assertEqual(records, item_logs))
+        expect(lambda: self.assertGreater(self.server.failed_logs, 0))
+        expect(lambda: self.assertEqual(1 + tests, methods['POST'] - self.server.logs))
+        expect(lambda: self.assertEqual(tests + 1, methods['PUT']))
+        expect(lambda: self.assertTrue(self.server.requests[-1][1].endswith('/finish')))
+        expect(lambda: self.assertGreater(records / duration, 200))
+        assert_expectations()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from delayed_assert import expect, assert_expectations
+
+from nose_reportportal.triage import KnownIssues, failure_signature
+
+
+def fail(value):
+    raise KeyError(value)
+
+
+def failure(value):
+    try:
+        fail(value)
+    except KeyError:
+        return sys.exc_info()
+
+
+class FailureSignatureTestCase(unittest.TestCase):
+
+    def test_message_is_ignored(self):
+        etype, _, tb = failure('first')
+        other_etype, _, other_tb = failure('second')
+
+        self.assertEqual(failure_signature(etype, tb), failure_signature(other_etype, other_tb))
+
+    def test_frames_are_compared(self):
+        etype, _, tb = failure('first')
+        try:
+            raise KeyError('first')
+        except KeyError:
+            other_etype, _, other_tb = sys.exc_info()
+
+        self.assertNotEqual(failure_signature(etype, tb), failure_signature(other_etype, other_tb))
+
+
+class KnownIssuesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'known_issues.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, index):
+        with open(self.path, 'w') as f:
+            json.dump(index, f)
+
+    def test_issue(self):
+        self._write({'a': 'PB', 'b': {'issue_type': 'SI_custom', 'comment': 'flaky'}, 'c': 'ab002'})
+        known_issues = KnownIssues(self.path, {'SI_custom': 'si_1a2b'})
+
+        expect(lambda: self.assertEqual('pb001', known_issues.issue('a')['issueType']))
+        expect(lambda: self.assertEqual('si_1a2b', known_issues.issue('b')['issueType']))
+        expect(lambda: self.assertEqual('flaky', known_issues.issue('b')['comment']))
+        expect(lambda: self.assertEqual('ab002', known_issues.issue('c')['issueType']))
+        expect(lambda: self.assertIsNone(known_issues.issue('unknown')))
+        assert_expectations()
+
+    def test_refresh_on_change(self):
+        self._write({'a': 'PB'})
+        known_issues = KnownIssues(self.path)
+        known_issues.issue('a')
+
+        self._write({'a': 'AB'})
+        mtime = time.time() + 10
+        os.utime(self.path, (mtime, mtime))
+
+        self.assertEqual('ab001', known_issues.issue('a')['issueType'])
+
+    def test_missing_index(self):
+        self.assertIsNone(KnownIssues(self.path).issue('a'))
+
+
+if __name__ == '__main__':
+    unittest.main()